@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+'''
+Micro-benchmarks for formsfive. Run them from the project root:
+
+    python -m benchmarks.fields
+
+The form suite can save its numbers and compare later runs with them:
+
+    python -m benchmarks.forms --save
+    python -m benchmarks.forms --compare
+'''
+import os
+import gc
+import sys
+import json
+import timeit
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def bench(label, func, number=10000, repeat=3):
+    '''
+    Time ``func`` and print the best run as microseconds per call.
+    '''
+    best = min(timeit.repeat(func, number=number, repeat=repeat))
+    print '%-40s %10.2f usec' % (label, best * 1e6 / number)
+    return best
+
+
+def kept_objects(func):
+    '''
+    Objects tracked by the garbage collector that one call
+    leaves alive, including whatever it returns.
+    '''
+    gc.collect()
+    before = len(gc.get_objects())
+    result = func()
+    gc.collect()
+    kept = len(gc.get_objects()) - before
+    del result
+    return kept
+
+
+def measure(label, func, number=1000, repeat=5):
+    '''
+    Print and return the operations per second and kept objects of ``func``.
+    '''
+    best = min(timeit.repeat(func, number=number, repeat=repeat))
+    result = {'ops': number / best, 'objects': kept_objects(func)}
+    print '%-40s %12.1f ops/sec %8d objects' % (label, result['ops'], result['objects'])
+    return result
+
+
+def compare(results, baseline, tolerance):
+    '''
+    Print each result next to its baseline and return the labels
+    that got slower than ``tolerance`` (a fraction) allows.
+    '''
+    slower = list()
+    for label, result in results:
+        if label not in baseline:
+            continue
+        ratio = result['ops'] / baseline[label]['ops']
+        objects = result['objects'] - baseline[label]['objects']
+        print '%-40s %8.2fx %+8d objects' % (label, ratio, objects)
+        if ratio < 1 - tolerance:
+            slower.append(label)
+    return slower
+
+
+def run(cases, argv=None):
+    '''
+    Measure ``cases``, a list of (label, func, number), then
+    optionally save them as the baseline or compare with it.
+    '''
+    from optparse import OptionParser
+    parser = OptionParser()
+    parser.add_option('--save', action='store_true', help='store the results as the baseline')
+    parser.add_option('--compare', action='store_true', help='compare the results with the baseline')
+    parser.add_option('--baseline', default=BASELINE, help='baseline file [%default]')
+    parser.add_option('--tolerance', type='float', default=0.3,
+        help='allowed slow down before failing [%default]')
+    options, args = parser.parse_args(argv)
+
+    results = [(label, measure(label, func, number)) for label, func, number in cases]
+
+    if options.compare:
+        baseline = json.load(open(options.baseline))
+        print
+        slower = compare(results, baseline, options.tolerance)
+        if slower:
+            print '\nslower than the baseline: %s' % ', '.join(slower)
+            sys.exit(1)
+    if options.save:
+        json.dump(dict(results), open(options.baseline, 'w'), indent=1, sort_keys=True)
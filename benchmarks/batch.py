@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+'''
+10000 TodoForm rows: one form per row versus validate_many.
+'''
+from benchmarks import bench
+from formsfive.tests.forms import TodoForm
+from formsfive import validate_many
+
+ROWS = [{'body': u'Story %s' % i, 'sample': u'15', 'task': u'Task %s' % i, 'units': unicode(i % 20 * 5)}
+        for i in xrange(10000)]
+
+
+def per_row():
+    for data in ROWS:
+        form = TodoForm(data)
+        form.is_valid()
+
+
+def main():
+    bench('TodoForm per row', per_row, number=1, repeat=3)
+    bench('validate_many', lambda: list(validate_many(TodoForm, ROWS)), number=1, repeat=3)
+    bench('validate_many, 4 processes', lambda: list(validate_many(TodoForm, ROWS, processes=4)),
+        number=1, repeat=3)
+
+
+if __name__ == '__main__':
+    main()
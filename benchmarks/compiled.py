@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+'''
+Widget renders with and without compiled render functions.
+'''
+from benchmarks import bench
+from benchmarks.forms import TextForm, TEXT_DATA, WideForm, WIDE_DATA
+from django.conf import settings
+import formsfive as forms
+
+
+def widgets():
+    return (
+        ('TextInput', forms.TextInput(), u'value'),
+        ('NumberInput', forms.NumberInput(attrs={'min': 0, 'max': 10}), u'5'),
+        ('EmailInput', forms.EmailInput(), u'me@example.com'),
+        ('CheckboxInput', forms.CheckboxInput(), True),
+        ('Textarea', forms.Textarea(), u'Some text'),
+        ('Select', forms.Select(choices=[(i, i) for i in xrange(3)]), u'1'),
+    )
+
+
+def main():
+    for compiled in (False, True):
+        settings.FORMSFIVE_COMPILE_RENDERS = compiled
+        suffix = compiled and ' compiled' or ''
+        for label, widget, value in widgets():
+            bench('%s.render()%s' % (label, suffix),
+                lambda: widget.render('field', value, {'id': 'id_field'}), number=5000)
+        bench('TextForm render%s' % suffix, lambda: unicode(TextForm(TEXT_DATA)), number=300)
+        bench('WideForm render%s' % suffix, lambda: unicode(WideForm(WIDE_DATA)), number=10)
+
+
+if __name__ == '__main__':
+    main()
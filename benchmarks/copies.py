@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+'''
+Deep copies made for every form instance (Form.__init__ copies base_fields).
+'''
+from benchmarks import bench
+from formsfive.testforms import TextForm
+import formsfive as forms
+import copy
+
+
+class ChoicesForm(forms.Form):
+    country = forms.ChoiceField(choices=[(i, u'Country %s' % i) for i in xrange(250)])
+    language = forms.ChoiceField(choices=[(i, u'Language %s' % i) for i in xrange(100)])
+    stamp = forms.DateTimeField(widget=forms.SplitDateTimeWidget)
+
+
+def main():
+    text = forms.CharField(placeholder='Text')
+    choice = ChoicesForm.base_fields['country']
+    split = forms.SplitDateTimeWidget()
+    bench('deepcopy(TextInput)', lambda: copy.deepcopy(text.widget))
+    bench('deepcopy(CharField)', lambda: copy.deepcopy(text))
+    bench('deepcopy(ChoiceField 250 choices)', lambda: copy.deepcopy(choice), number=1000)
+    bench('deepcopy(SplitDateTimeWidget)', lambda: copy.deepcopy(split))
+    bench('TextForm()', TextForm, number=2000)
+    bench('ChoicesForm()', ChoicesForm, number=1000)
+
+
+if __name__ == '__main__':
+    main()
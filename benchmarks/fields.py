@@ -0,0 +1,22 @@
+#!/usr/bin/env python
+from benchmarks import bench
+import formsfive as forms
+
+
+class WideForm(forms.Form):
+    text = forms.CharField(placeholder='Text')
+    pos = forms.IntegerField(max=100, min=5, step=5)
+    date = forms.DateTimeField()
+    email = forms.EmailField(autofocus=True)
+    choice = forms.ChoiceField(choices=(('en', 'English'), ('de', 'Deutsch')))
+
+
+def main():
+    bench('CharField()', lambda: forms.CharField())
+    bench('CharField(placeholder=...)', lambda: forms.CharField(placeholder='Text'))
+    bench('IntegerField(min, max, step)', lambda: forms.IntegerField(max=100, min=5, step=5))
+    bench('WideForm()', WideForm, number=2000)
+
+
+if __name__ == '__main__':
+    main()
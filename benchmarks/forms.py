@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+'''
+Construction, binding, validation and rendering of whole forms:
+
+    python -m benchmarks.forms [--save] [--compare] [--tolerance 0.3]
+'''
+from benchmarks import run
+from django.forms.formsets import formset_factory
+from formsfive.testforms import TextForm
+from formsfive.tests.forms import TodoForm
+import formsfive as forms
+
+TEXT_DATA = {
+    'text': u'Some text', 'pw': u'secret', 'hide': u'hidden', 'date': u'2012-01-01 10:00',
+    'time': u'10:00', 'query': u'search', 'color': u'#ffffff', 'num': u'24', 'pos': u'10',
+    'range_': u'5', 'ds_0': u'2012-01-01', 'ds_1': u'10:00', 'dt': u'2012-01-01 10:00',
+}
+TODO_DATA = {'body': u'A story', 'sample': u'15', 'task': u'Write benchmarks', 'units': u'10'}
+
+# 200 fields of every common kind
+WIDE_FIELDS = dict()
+for i in xrange(50):
+    WIDE_FIELDS['text_%s' % i] = forms.CharField(placeholder=u'Text %s' % i)
+    WIDE_FIELDS['number_%s' % i] = forms.IntegerField(min=0, max=100, step=5)
+    WIDE_FIELDS['email_%s' % i] = forms.EmailField(required=False)
+    WIDE_FIELDS['choice_%s' % i] = forms.ChoiceField(choices=(('a', u'A'), ('b', u'B'), ('c', u'C')))
+WideForm = type('WideForm', (forms.Form,), WIDE_FIELDS)
+WIDE_DATA = dict()
+for i in xrange(50):
+    WIDE_DATA.update({'text_%s' % i: u'text', 'number_%s' % i: u'50',
+                      'email_%s' % i: u'me@example.com', 'choice_%s' % i: u'b'})
+
+
+class SelectForm(forms.Form):
+    option = forms.ChoiceField(choices=[(i, u'Option %s' % i) for i in xrange(10000)])
+
+SELECT_DATA = {'option': u'5000'}
+
+
+class RowForm(forms.Form):
+    task = forms.CharField(placeholder=u'Task')
+    units = forms.IntegerField(min=0, max=100, step=5)
+    done = forms.BooleanField(required=False)
+
+RowFormSet = formset_factory(RowForm, extra=0)
+ROWS_DATA = {'form-TOTAL_FORMS': u'100', 'form-INITIAL_FORMS': u'0', 'form-MAX_NUM_FORMS': u''}
+for i in xrange(100):
+    ROWS_DATA.update({'form-%s-task' % i: u'Task %s' % i, 'form-%s-units' % i: u'10',
+                      'form-%s-done' % i: u'on'})
+
+
+def validate(form):
+    assert form.is_valid(), form.errors
+    return form
+
+
+def cases(label, form_class, data, number):
+    '''
+    The four stages of a form's life; each stage includes the earlier ones.
+    '''
+    return [
+        ('%s construct' % label, lambda: form_class(), number),
+        ('%s bind' % label, lambda: form_class(data), number),
+        ('%s validate' % label, lambda: validate(form_class(data)), number),
+        ('%s render' % label, lambda: unicode(form_class(data)), number),
+    ]
+
+
+def main():
+    run(cases('TextForm', TextForm, TEXT_DATA, 500) +
+        cases('TodoForm', TodoForm, TODO_DATA, 500) +
+        cases('WideForm 200 fields', WideForm, WIDE_DATA, 20) +
+        cases('SelectForm 10k options', SelectForm, SELECT_DATA, 20) +
+        [('FormSet 100 rows validate', lambda: validate(RowFormSet(ROWS_DATA)), 10),
+         ('FormSet 100 rows render', lambda: unicode(RowFormSet(ROWS_DATA)), 10)])
+
+
+if __name__ == '__main__':
+    main()
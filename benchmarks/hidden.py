@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+'''
+Bulk-action forms carrying thousands of selected ids as hidden inputs.
+'''
+from benchmarks import bench
+from django.http import QueryDict
+import formsfive as forms
+
+IDS = [unicode(i) for i in xrange(20000)]
+
+
+def main():
+    widget = forms.MultipleHiddenInput()
+    compact = forms.MultipleHiddenInput(delimiter=',')
+    for count in (5000, 20000):
+        ids = IDS[:count]
+        bench('render %s hidden inputs' % count,
+            lambda: widget.render('ids', ids, {'id': 'id_ids'}), number=5)
+        bench('render %s ids delimited' % count,
+            lambda: compact.render('ids', ids, {'id': 'id_ids'}), number=20)
+        body = '&'.join(['ids=%s' % i for i in ids])
+        bench('parse and read %s hidden inputs' % count,
+            lambda: widget.value_from_datadict(QueryDict(body), {}, 'ids'), number=5)
+        body = 'ids=%s' % '%2C'.join(ids)
+        bench('parse and read %s ids delimited' % count,
+            lambda: compact.value_from_datadict(QueryDict(body), {}, 'ids'), number=20)
+
+
+if __name__ == '__main__':
+    main()
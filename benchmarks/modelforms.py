@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+'''
+Creating model form classes for a model with many fields.
+'''
+from benchmarks import bench
+from django.db import models
+from formsfive.models import formfield_defaults
+import formsfive as forms
+
+
+class Slug(models.CharField):
+    pass
+
+attrs = {'__module__': __name__, 'Meta': type('Meta', (), {'app_label': 'benchmarks'})}
+for i in xrange(20):
+    attrs['name_%s' % i] = models.CharField(max_length=100)
+    attrs['slug_%s' % i] = Slug(max_length=100)
+    attrs['count_%s' % i] = models.PositiveIntegerField()
+    attrs['ip_%s' % i] = models.GenericIPAddressField()
+    attrs['numbers_%s' % i] = models.CommaSeparatedIntegerField(max_length=100)
+Wide = type('Wide', (models.Model,), attrs)
+
+
+def create_form():
+    Meta = type('Meta', (), {'model': Wide})
+    return type('WideForm', (forms.HTML5ModelForm,), {'Meta': Meta})
+
+
+def resolve():
+    for field in Wide._meta.fields:
+        formfield_defaults(field.__class__)
+
+
+def main():
+    bench('resolve 100 model fields', resolve, number=1000)
+    bench('HTML5ModelForm class, 100 model fields', create_form, number=100)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+from benchmarks import bench
+import formsfive as forms
+
+
+def main():
+    for size in (5000, 50000):
+        choices = [(i, u'Option %s' % i) for i in xrange(size)]
+        widget = forms.Select(choices=choices)
+        multiple = forms.SelectMultiple(choices=choices)
+        bench('Select %s options' % size, lambda: widget.render('select', size // 2), number=10)
+        bench('SelectMultiple %s options' % size, lambda: multiple.render('select', [1, 2, 3]), number=10)
+        cached = forms.Select(choices=choices)
+        cached.cache_fragments = True
+        bench('Select %s options (fragment cache)' % size, lambda: cached.render('select', size // 2), number=10)
+
+    permissions = [(i, u'Permission %s' % i) for i in xrange(500)]
+    checkboxes = forms.CheckboxSelectMultiple(choices=permissions)
+    bench('CheckboxSelectMultiple 500 choices',
+        lambda: checkboxes.render('perms', range(0, 500, 3), {'id': 'id_perms'}), number=100)
+
+    radios = forms.RadioSelect(choices=permissions)
+    radios.is_required = True
+    bench('RadioSelect 500 choices', lambda: radios.render('perm', 250, {'id': 'id_perm'}), number=100)
+
+
+if __name__ == '__main__':
+    main()
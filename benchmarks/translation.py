@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+'''
+Rendering widgets with translated (lazy) placeholders.
+'''
+from benchmarks import bench
+from django.utils import translation
+import formsfive as forms
+
+WIDGETS = (
+    forms.SearchInput(),
+    forms.EmailInput(),
+    forms.URLInput(),
+)
+
+
+def render_widgets():
+    for widget in WIDGETS:
+        widget.render('field', 'value', {'id': 'id_field'})
+
+
+def switch_languages():
+    for language in ('en', 'de', 'fr'):
+        translation.activate(language)
+        render_widgets()
+    translation.deactivate()
+
+
+def main():
+    translation.activate('de')
+    bench('render 3 placeholder widgets', render_widgets)
+    translation.deactivate()
+    bench('render them in 3 languages', switch_languages, number=3000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+'''
+HTML5 constraints checked in one pass versus one Django validator each.
+'''
+from benchmarks import bench
+from django.core.exceptions import ValidationError
+from django.core import validators
+from django import forms as django
+from formsfive.constraints import get_constraints
+import formsfive as forms
+
+
+class StepValidator(validators.BaseValidator):
+    compare = lambda self, a, b: (a - 5) % b
+    message = u'Ensure this value is 5 plus a multiple of %(limit_value)s.'
+    code = 'step'
+
+
+def main():
+    stacked = [validators.MinValueValidator(5), validators.MaxValueValidator(100), StepValidator(5)]
+    constraints = get_constraints(5, 100, 5)
+
+    def run_stacked(value):
+        errors = []
+        for validator in stacked:
+            try:
+                validator(value)
+            except ValidationError, e:
+                errors.extend(e.messages)
+        return errors
+
+    bench('3 Django validators, valid', lambda: run_stacked(50), number=20000)
+    bench('one pass constraints, valid', lambda: constraints.error(50), number=20000)
+    bench('3 Django validators, invalid', lambda: run_stacked(52), number=20000)
+    bench('one pass constraints, invalid', lambda: constraints.error(52), number=20000)
+
+    django_field = django.IntegerField(min_value=5, max_value=100, validators=[StepValidator(5)])
+    five_field = forms.IntegerField(min=5, max=100, step=5)
+    bench('django IntegerField.clean', lambda: django_field.clean('50'), number=20000)
+    bench('formsfive IntegerField.clean', lambda: five_field.clean('50'), number=20000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+'''
+Whitespace normalization of a 5 MB textarea submission.
+'''
+from benchmarks import bench
+from formsfive.tests.forms import TodoForm
+import formsfive as forms
+
+BODY = (u'Lorem ipsum dolor sit amet, consectetur adipiscing elit.\n' * 90000)[:5 * 1024 * 1024]
+
+
+class RawTodoForm(TodoForm):
+    body = forms.CharField(widget=forms.Textarea, whitespace='none')
+
+
+def validate(body, form_class=TodoForm):
+    form = form_class({'body': body, 'sample': u'15', 'task': u'Task', 'units': u'10'})
+    assert form.is_valid(), form.errors
+    return form
+
+
+def main():
+    bench('5 MB body', lambda: validate(BODY), number=20)
+    bench('5 MB body with surrounding whitespace', lambda: validate(u'  %s\n\n' % BODY), number=20)
+    bench("5 MB body, whitespace='none'", lambda: validate(BODY, RawTodoForm), number=20)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+from benchmarks import bench
+import formsfive as forms
+
+
+WIDGETS = (
+    forms.TextInput(),
+    forms.PasswordInput(),
+    forms.NumberInput(attrs={'min': 0, 'max': 10}),
+    forms.DateInput(),
+    forms.EmailInput(),
+    forms.HiddenInput(),
+)
+
+
+def render_widgets(count=10000):
+    for i in xrange(count):
+        widget = WIDGETS[i % len(WIDGETS)]
+        widget.render('field', 'value', {'id': 'id_field'})
+
+
+def main():
+    for widget in WIDGETS:
+        bench('%s.render()' % widget.__class__.__name__,
+            lambda: widget.render('field', 'value', {'id': 'id_field'}))
+    bench('render 10k widgets', render_widgets, number=1)
+
+
+if __name__ == '__main__':
+    main()
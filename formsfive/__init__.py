@@ -11,6 +11,9 @@ from fields import *
 from models import *
 from widgets import *
 from extra import *
+from streaming import *
+from timing import *
+from batch import *
 
 __author__ = 'Jay States'
 __version__ = '0.0.4'
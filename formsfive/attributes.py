@@ -9,7 +9,7 @@ TEXT_SEARCH = (
     'pattern', 'placeholder', 'readonly',
     'size', 'spellcheck')
 
-EMAIL = ('multiple')
+EMAIL = ('multiple',)
 
 SELECT = ('multiple', 'name', 'size')
 
@@ -21,4 +21,23 @@ RANGE = ('min', 'max', 'list', 'step')
 
 CHOICE = ('value', 'choices', 'check_test')
 
-WIDGETS = ('is_required', 'autofocus', 'disabled', 'placeholder', 'pattern', 'spellcheck')
\ No newline at end of file
+WIDGETS = ('is_required', 'autofocus', 'disabled', 'placeholder', 'pattern', 'spellcheck')
+
+# the order widget attributes are collected in, which is the order
+# they were found in the widget's __dict__ before the attribute plans;
+# keeping it keeps the rendered attribute order unchanged
+COLLECT_ORDER = (
+    'spellcheck', 'pattern', 'min', 'max', 'results',
+    'check_test', 'choices', 'readonly', 'step', 'placeholder')
+
+# default pattern attributes of the text like widgets
+TEXT_PATTERN = r'^[\w\s]+'
+SLUG_PATTERN = r'[\w-]+'
+IPV4_PATTERN = r'(25[0-5]|2[0-4]\d|[0-1]?\d?\d)(\.(25[0-5]|2[0-4]\d|[0-1]?\d?\d)){3}'
+EMAIL_PATTERN = r'/^((?!@)\S)+[@]((?!@)\S)+/'
+
+# HTML5 attributes kept in a widget's spec and their values when unset
+SPEC = {
+    'autofocus': False, 'disabled': False, 'autocorrect': 'off', 'autocapitalize': 'off',
+    'placeholder': None, 'pattern': None, 'spellcheck': None, 'readonly': None,
+    'results': None, 'min': None, 'max': None, 'step': None}
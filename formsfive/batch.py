@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+'''
+Validate many submissions of one form class, e.g. the rows of a CSV file:
+
+    for cleaned_data, errors in validate_many(TodoForm, csv.DictReader(upload)):
+        ...
+
+Every row is cleaned by the same form instance, so the fields are
+copied once instead of once per row. Rows are read and results yielded
+one at a time; ``processes`` spreads the rows over a pool, which only
+pays off for expensive forms on several cores (see validate_many).
+'''
+from django.utils.encoding import force_unicode
+from django.db import connections
+from multiprocessing import Pool
+import copy
+
+__all__ = ('BatchValidator', 'validate_many')
+
+
+class BatchValidator(object):
+    '''
+    Clean data dictionaries with one reusable instance of ``form_class``.
+    Keyword arguments are passed on to the form, e.g. ``prefix`` or
+    ``instance``; model forms validate each row against a fresh copy of
+    ``instance`` (or a new model instance).
+    '''
+    def __init__(self, form_class, **kwargs):
+        self.form = form_class(data={}, **kwargs)
+        self.instance = kwargs.get('instance')
+        self.model = hasattr(self.form, 'instance') and self.form._meta.model or None
+
+    def validate(self, data, files=None):
+        '''
+        Return (cleaned_data, errors) for one row. cleaned_data is None
+        when the row has errors; errors maps field names to a list of
+        messages and is empty for a valid row.
+        '''
+        form = self.form
+        form.data, form.files = data, files or {}
+        form._errors = form._changed_data = None
+        if self.model is not None:
+            form.instance = self.instance is not None and copy.copy(self.instance) or self.model()
+        form.full_clean()
+        if form._errors:
+            errors = dict([(name, [force_unicode(message) for message in messages])
+                for name, messages in form._errors.iteritems()])
+            return None, errors
+        return form.cleaned_data, {}
+
+
+_worker = None
+
+
+def start_worker(form_class, kwargs):
+    global _worker
+    # a forked worker must not use (or close) the parent's database
+    # connections; dropping them makes it open its own when needed
+    for connection in connections.all():
+        connection.connection = None
+    _worker = BatchValidator(form_class, **kwargs)
+
+
+def validate_row(data):
+    return _worker.validate(data)
+
+
+def validate_many(form_class, rows, processes=None, chunksize=100, **kwargs):
+    '''
+    Yield (cleaned_data, errors) for every data dictionary in ``rows``,
+    in order. With ``processes`` the rows are validated by that many
+    worker processes, ``chunksize`` rows at a time; the form class must
+    then be importable by the workers and the rows picklable.
+
+    Every row and result is pickled between the processes, which costs
+    about as much as cleaning a simple form. Processes only pay off on
+    a machine with spare cores and forms whose clean is expensive
+    (e.g. costly custom validation); otherwise the serial path is
+    faster (see benchmarks/batch.py).
+    '''
+    if not processes:
+        validator = BatchValidator(form_class, **kwargs)
+        for data in rows:
+            yield validator.validate(data)
+        return
+
+    pool = Pool(processes, start_worker, (form_class, kwargs))
+    try:
+        for result in pool.imap(validate_row, rows, chunksize):
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
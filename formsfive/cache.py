@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+'''
+Opt-in cache for rendered widget fragments.
+
+Widgets with static choices (Select, NullBooleanSelect, RadioSelect,
+CheckboxSelectMultiple) render the same markup for every form instance.
+Enable caching per widget with ``widget.cache_fragments = True`` or for
+all of them with ``FORMSFIVE_CACHE_FRAGMENTS = True``.
+
+Settings:
+    FORMSFIVE_FRAGMENT_CACHE - a CACHES alias or backend path
+        (default: a least-recently-used local memory cache)
+    FORMSFIVE_FRAGMENT_CACHE_SIZE - maximum entries of the default cache
+    FORMSFIVE_FRAGMENT_CACHE_TIMEOUT - seconds a fragment is kept
+
+The generation of the fragments is kept in the cache itself, so
+invalidate_fragments() reaches every process sharing the cache.
+'''
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends import locmem
+from django.utils.encoding import force_unicode
+from django.utils.safestring import mark_safe
+from django.utils.hashcompat import md5_constructor
+from django.utils.translation import get_language
+from django.core.cache import get_cache
+from django.conf import settings
+from formsfive.utils import create_attributes, single_attributes
+from collections import OrderedDict
+from functools import wraps
+from itertools import chain
+import random
+
+MISSING = object()
+GENERATION_KEY = 'formsfive:generation'
+
+_fragment_cache = None
+
+
+class LRULocMemCache(LocMemCache):
+    '''
+    Local memory cache that evicts the least recently used entries
+    once MAX_ENTRIES is reached, where LocMemCache culls arbitrary keys.
+    '''
+    def __init__(self, name, params):
+        locmem._caches.setdefault(name, OrderedDict())
+        super(LRULocMemCache, self).__init__(name, params)
+
+    def get(self, key, default=None, version=None):
+        value = super(LRULocMemCache, self).get(key, MISSING, version)
+        if value is MISSING:
+            return default
+        key = self.make_key(key, version=version)
+        with self._lock.writer():
+            if key in self._cache:
+                self._cache[key] = self._cache.pop(key)
+        return value
+
+    def _set(self, key, value, timeout=None):
+        self._cache.pop(key, None)
+        super(LRULocMemCache, self)._set(key, value, timeout)
+
+    def _cull(self):
+        while self._cache and len(self._cache) >= self._max_entries:
+            self._delete(next(iter(self._cache)))
+
+
+def get_fragment_cache():
+    global _fragment_cache
+    if _fragment_cache is None:
+        backend = getattr(settings, 'FORMSFIVE_FRAGMENT_CACHE', None)
+        if backend:
+            _fragment_cache = get_cache(backend)
+        else:
+            _fragment_cache = get_cache('formsfive.cache.LRULocMemCache',
+                LOCATION='formsfive-fragments',
+                TIMEOUT=getattr(settings, 'FORMSFIVE_FRAGMENT_CACHE_TIMEOUT', 3600),
+                OPTIONS={'MAX_ENTRIES': getattr(settings, 'FORMSFIVE_FRAGMENT_CACHE_SIZE', 1000)})
+    return _fragment_cache
+
+
+def new_generation():
+    # a random start, so a counter that was evicted does not bring
+    # back the fragments of an earlier generation
+    return random.getrandbits(48)
+
+
+def fragment_generation(cache):
+    '''
+    The current generation of the fragments, shared by every process
+    using ``cache``.
+    '''
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, new_generation())
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def invalidate_fragments(sender=None, **kwargs):
+    '''
+    Forget every cached fragment, in every process sharing the
+    fragment cache. The signature allows connecting it as a receiver,
+    e.g.:
+
+        post_save.connect(invalidate_fragments, sender=Country)
+    '''
+    cache = get_fragment_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # no generation yet (or evicted): the next one is new anyway
+        cache.add(GENERATION_KEY, new_generation())
+
+
+def fragments_enabled(widget):
+    enabled = getattr(widget, 'cache_fragments', None)
+    if enabled is None:
+        enabled = getattr(settings, 'FORMSFIVE_CACHE_FRAGMENTS', False)
+    return enabled
+
+
+def normalize(value):
+    if isinstance(value, dict):
+        value = value.items()
+    if isinstance(value, (list, tuple, set)):
+        return sorted([normalize(v) for v in value])
+    if isinstance(value, basestring):
+        return force_unicode(value)
+    # 1, True and '1' are not the same selection to NullBooleanSelect
+    return type(value).__name__, force_unicode(value)
+
+
+def flatten_choices(choices):
+    return [(force_unicode(value), isinstance(label, (list, tuple)) and flatten_choices(label)
+        or force_unicode(label)) for value, label in choices]
+
+
+def choices_digest(widget, choices=()):
+    '''
+    Identify the version of a widget's static choices, or None when
+    they are dynamic (e.g. a queryset). Kept on the widget until the
+    choices or the language change.
+    '''
+    if not isinstance(widget.choices, (list, tuple)) or not isinstance(choices, (list, tuple)):
+        return None
+    language, extra = get_language(), tuple(choices)
+    cached = widget.__dict__.get('_choices_digest')
+    if cached is not None and cached[0] == language and cached[1] == widget.choices and cached[2] == extra:
+        return cached[3]
+    digest = md5_constructor(repr(flatten_choices(chain(widget.choices, extra)))).hexdigest()
+    widget._choices_digest = (language, list(widget.choices), extra, digest)
+    return digest
+
+
+def fragment_key(widget, name, value, attrs=None, choices=(), generation=None):
+    '''
+    Key a fragment on the widget class, the version of its choices,
+    everything that ends up as an attribute, the selected values and
+    the generation of the fragments. Returns None when the choices
+    are not static.
+    '''
+    digest = choices_digest(widget, choices)
+    if digest is None:
+        return None
+    parts = (
+        widget.__class__.__module__, widget.__class__.__name__, digest,
+        name, normalize(value), normalize(attrs or {}), normalize(widget.attrs),
+        normalize(create_attributes(widget)), single_attributes(widget),
+        get_language(), generation,
+    )
+    return 'formsfive:%s' % md5_constructor(repr(parts)).hexdigest()
+
+
+def cache_fragment(render):
+    '''
+    Route a widget's render method through the fragment cache
+    when the widget has opted in.
+    '''
+    @wraps(render)
+    def wrapper(self, name, value, attrs=None, choices=()):
+        if not fragments_enabled(self):
+            return render(self, name, value, attrs, choices)
+        if choices_digest(self, choices) is None:
+            return render(self, name, value, attrs, choices)
+        cache = get_fragment_cache()
+        key = fragment_key(self, name, value, attrs, choices, fragment_generation(cache))
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = render(self, name, value, attrs, choices)
+            cache.set(key, fragment)
+        return mark_safe(fragment)
+    return wrapper
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+'''
+Opt-in compiled render functions.
+
+The first time a widget renders in a given state it is rendered once
+with markers in place of the name, the value and the attrs passed to
+render. The markup around the markers is compiled into a function that
+only joins the literal markup with the escaped values, so later renders
+skip create_attributes, build_attrs and flatatt. The output is the same
+as the normal render, down to the order of the attributes.
+
+Widgets in an equal state (e.g. the copies a form makes of its fields)
+share the compiled functions. Changing a widget attribute changes its
+state, so the widget is compiled again.
+
+Enable it per widget with ``widget.compile_renders = True`` or for all
+widgets with ``FORMSFIVE_COMPILE_RENDERS = True``.
+'''
+from django.utils.encoding import force_unicode
+from django.utils.html import conditional_escape
+from django.utils.safestring import mark_safe
+from django.utils.functional import Promise
+from django.utils.translation import get_language
+from django.conf import settings
+from formsfive.spec import HTML5Spec
+from functools import wraps
+import copy
+import re
+
+MARK = u'\ue000%s\ue001'
+MARK_RE = re.compile(u'\ue000(\w+)\ue001')
+# widget state that only affects the options, which are never compiled
+IGNORED_STATE = ('choices', '_compiled_options', '_choices_digest', '_compiled_render')
+MAX_STATES = 1000
+
+_states = dict()
+_functions = dict()
+
+
+def escape(value):
+    '''
+    conditional_escape(), skipping its lazy and SafeData wrappers for
+    plain strings.
+    '''
+    if type(value) is str:
+        value = force_unicode(value)
+    if type(value) is unicode:
+        return value.replace(u'&', u'&amp;').replace(u'<', u'&lt;').replace(u'>', u'&gt;').replace(
+            u'"', u'&quot;').replace(u"'", u'&#39;')
+    return conditional_escape(value)
+
+
+def compiling_enabled(widget):
+    enabled = getattr(widget, 'compile_renders', None)
+    if enabled is None:
+        enabled = getattr(settings, 'FORMSFIVE_COMPILE_RENDERS', False)
+    return enabled
+
+
+def freeze(value):
+    '''
+    A hashable copy of a piece of widget state. Lazy strings are
+    represented by their message. Raises TypeError for state that
+    cannot be compared this way.
+    '''
+    if isinstance(value, Promise):
+        return ('lazy', freeze(value.__reduce__()[1]))
+    if isinstance(value, HTML5Spec):
+        value = dict(value.items())
+    if isinstance(value, dict):
+        return tuple(sorted([(key, freeze(item)) for key, item in value.iteritems()]))
+    if isinstance(value, (list, tuple)):
+        return tuple([freeze(item) for item in value])
+    hash(value)
+    return value
+
+
+def compiled_functions(widget):
+    '''
+    The compiled functions of the widget's current state, or None when
+    the state cannot be compiled.
+    '''
+    entry = widget.__dict__.get('_compiled_render')
+    if entry is not None and entry[0] == widget.__dict__:
+        return entry[1]
+    try:
+        state = (widget.__class__, freeze(dict([(key, value)
+            for key, value in widget.__dict__.iteritems() if key not in IGNORED_STATE])))
+        functions = _states.get(state)
+        if functions is None:
+            if len(_states) >= MAX_STATES:
+                _states.clear()
+            functions = _states[state] = dict()
+    except TypeError:
+        functions = None
+    entry = widget._compiled_render = [None, functions]
+    # attrs is the one mutable piece of state
+    entry[0] = dict(widget.__dict__, attrs=widget.attrs.copy())
+    return functions
+
+
+def generate(output, keys):
+    '''
+    Return the source of a function joining the literal parts of the
+    probe ``output`` with the escaped name, value and attrs, or None if
+    the output contains unexpected markers.
+    '''
+    parts = list()
+    for i, piece in enumerate(MARK_RE.split(output)):
+        if not i % 2:
+            if u'\ue000' in piece or u'\ue001' in piece:
+                return None
+            if piece:
+                parts.append(repr(piece))
+        elif piece in ('name', 'value'):
+            parts.append(piece)
+        elif piece.startswith('attr') and int(piece[4:]) < len(keys):
+            parts.append('escape(attrs[%r])' % keys[int(piece[4:])])
+        else:
+            return None
+    return 'def render(name, value, attrs):\n    return u"".join((%s,))\n' % ', '.join(parts)
+
+
+def compile_render(render, widget, keys, probe, overrides=None):
+    '''
+    Render ``widget`` with markers and compile the result.
+    '''
+    if overrides:
+        widget = copy.copy(widget)
+        widget.__dict__.update(overrides)
+    attrs = dict([(key, MARK % ('attr%s' % i)) for i, key in enumerate(keys)])
+    source = generate(render(widget, MARK % 'name', probe, attrs), keys)
+    if source is None:
+        return None
+    function = _functions.get(source)
+    if function is None:
+        namespace = {'escape': escape}
+        exec compile(source, '<formsfive compiled render>', 'exec') in namespace
+        function = _functions[source] = namespace['render']
+    return function
+
+
+def compiled_render(shape):
+    '''
+    Decorate a widget render method so it is compiled when the widget
+    has opted in. ``shape(widget, value)`` returns (key, text, probe,
+    overrides): a key for the parts of the markup that depend on the
+    value, the escaped value as it appears in the markup, the value to
+    render the markers with and widget attributes to set while doing so.
+    '''
+    def decorator(render):
+        @wraps(render)
+        def wrapper(self, name, value, attrs=None, *args, **kwargs):
+            if args or kwargs or not compiling_enabled(self):
+                return render(self, name, value, attrs, *args, **kwargs)
+            functions = compiled_functions(self)
+            if functions is None:
+                return render(self, name, value, attrs)
+            key, text, probe, overrides = shape(self, value)
+            keys = attrs and tuple(attrs) or ()
+            function_key = (render, get_language(), keys, key)
+            try:
+                function = functions[function_key]
+            except KeyError:
+                function = functions[function_key] = compile_render(render, self, keys, probe, overrides)
+            if function is None:
+                return render(self, name, value, attrs)
+            return mark_safe(function(escape(name), text, attrs))
+        return wrapper
+    return decorator
+
+
+def input_shape(widget, value):
+    if value is None:
+        value = ''
+    if value != '':
+        return True, escape(force_unicode(value)), MARK % 'value', None
+    return False, None, value, None
+
+
+class CheckResult(object):
+    '''
+    Stands in for check_test while a CheckboxInput renders the markers:
+    it answers as the real value did and renders as the real check_test
+    (the CHOICE attributes include check_test).
+    '''
+    def __init__(self, check_test, checked):
+        self.check_test, self.checked = check_test, checked
+
+    def __call__(self, value):
+        return self.checked
+
+    def __unicode__(self):
+        return force_unicode(self.check_test)
+
+
+def checkbox_shape(widget, value):
+    try:
+        checked = bool(widget.check_test(value))
+    except:  # Silently catch exceptions, as CheckboxInput.render does
+        checked = False
+    overrides = {'check_test': CheckResult(widget.check_test, checked)}
+    if value not in ('', True, False, None):
+        return (checked, True), escape(force_unicode(value)), MARK % 'value', overrides
+    return (checked, False), None, value, overrides
+
+
+def textarea_shape(widget, value):
+    if value is None:
+        value = ''
+    return None, escape(force_unicode(value)), MARK % 'value', None
+
+
+def tag_shape(widget, start):
+    # the start tag of a select, see Select.start_tag
+    return start, None, start, None
+
+
+def clear_compiled_cache():
+    '''
+    Forget every compiled render, e.g. in tests.
+    '''
+    _states.clear()
+    _functions.clear()
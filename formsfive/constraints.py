@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+'''
+Server-side mirror of the HTML5 constraints a browser checks: min,
+max and step on numbers and pattern on text. ``required`` is already
+enforced by Django's fields.
+
+The constraints are read from the limits declared for the field,
+compiled once per distinct set of values and checked in a single pass
+that only builds an error when a value fails.
+'''
+from django.utils.encoding import force_unicode
+from formsfive.patterns import compile_pattern, source_pattern
+from formsfive.utils import is_empty
+from decimal import Decimal, InvalidOperation
+
+NUMBERS = (int, long, float, Decimal)
+LIMITS = ('min', 'max', 'step')
+MAX_COMPILED = 1000
+
+_compiled = dict()
+
+
+def to_number(value):
+    '''
+    A limit as an int when it is integral, else a Decimal;
+    None when it is not a number.
+    '''
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, long)):
+        return value
+    try:
+        number = Decimal(str(value))
+    except (InvalidOperation, ValueError, UnicodeEncodeError):
+        return None
+    if number == number.to_integral_value():
+        return int(number)
+    return number
+
+
+class Constraints(object):
+    '''
+    The compiled constraints of one set of HTML5 attribute values.
+    Integral limits stay ints, so whole numbers are checked without
+    touching the (slow) decimal module.
+    '''
+    def __init__(self, min=None, max=None, step=None, pattern=None):
+        self.min, self.max, self.step = to_number(min), to_number(max), to_number(step)
+        if self.step is not None and self.step <= 0:
+            self.step = None
+        self.base = self.min is not None and self.min or 0
+        limits = [limit for limit in (self.min, self.max, self.step) if limit is not None]
+        self.numeric = bool(limits)
+        self.integral = all([isinstance(limit, (int, long)) for limit in limits])
+        # the browser matches the whole value against the pattern
+        self.source = pattern and source_pattern(pattern) or None
+        self.pattern = self.source and compile_pattern(u'^(?:%s)$' % self.source) or None
+
+    def __nonzero__(self):
+        return self.numeric or self.pattern is not None
+
+    def error(self, value):
+        '''
+        Return the (code, params) of the first violated constraint, or None.
+        '''
+        if self.numeric and isinstance(value, NUMBERS) and not isinstance(value, bool):
+            if not self.integral and isinstance(value, float):
+                # floats do not compare with decimals
+                value = Decimal(repr(value))
+            if self.min is not None and value < self.min:
+                return 'min_value', {'limit_value': self.min}
+            if self.max is not None and value > self.max:
+                return 'max_value', {'limit_value': self.max}
+            if self.step is not None:
+                if not (self.integral and isinstance(value, (int, long))):
+                    value = Decimal(repr(value)) if isinstance(value, float) else Decimal(value)
+                if (value - self.base) % self.step:
+                    return 'step', {'step': self.step, 'base': self.base}
+        elif self.pattern is not None and isinstance(value, basestring):
+            if self.pattern.match(force_unicode(value)) is None:
+                return 'pattern', {'pattern': self.source}
+        return None
+
+
+def get_constraints(min=None, max=None, step=None, pattern=None):
+    '''
+    The shared Constraints of these values, compiled on first use.
+    '''
+    key = (min, max, step, pattern)
+    try:
+        return _compiled[key]
+    except KeyError:
+        if len(_compiled) >= MAX_COMPILED:
+            _compiled.clear()
+        return _compiled.setdefault(key, Constraints(min, max, step, pattern))
+    except TypeError:
+        # unhashable limits
+        return Constraints(min, max, step, pattern)
+
+
+def declared_limits(widget):
+    '''
+    The min, max and step set explicitly: on the field or the widget
+    (both end up in the widget's spec) or in the widget's attrs. The
+    class defaults, e.g. NumberInput's min 1 and max 5, are rendered
+    but never enforced.
+    '''
+    attrs = getattr(widget, 'attrs', None) or {}
+    implicit = getattr(widget, 'implicit_attrs', None) or {}
+    spec = getattr(widget, 'html5', None) or {}
+    limits = list()
+    for key in LIMITS:
+        value = spec.get(key)
+        if is_empty(value):
+            value = attrs.get(key)
+            if key in implicit and type(value) is type(implicit[key]) and value == implicit[key]:
+                value = None
+        limits.append(value)
+    return limits
+
+
+def field_constraints(field):
+    '''
+    Numbers follow the limits declared for the field (see
+    declared_limits), patterns only when declared on the field: the
+    default patterns of the text widgets are hints, never enforced
+    before. The result is kept on the field until either spec or the
+    widget's limit attrs change.
+    '''
+    widget = field.widget
+    attrs = getattr(widget, 'attrs', None) or {}
+    # typed, so changing a limit from False to 0 is noticed
+    limits = tuple([(type(attrs.get(key)), attrs.get(key)) for key in LIMITS])
+    spec, declared = getattr(widget, 'html5', None), field.html5
+    cached = field.__dict__.get('_constraints')
+    if cached is not None and cached[0] is spec and cached[1] is declared and cached[2] == limits:
+        return cached[3]
+    constraints = get_constraints(*declared_limits(widget) + [declared.get('pattern')])
+    field._constraints = (spec, declared, limits, constraints)
+    return constraints
@@ -5,8 +5,13 @@ from django.utils.safestring import mark_safe
 from django.utils.html import escape, conditional_escape
 from django.core.exceptions import ValidationError
 from django.utils.simplejson import JSONEncoder
+from django.core.urlresolvers import NoReverseMatch
+from django.db.models.query import QuerySet
+from django.db.models import Model, get_model
 from django.utils.safestring import mark_safe
 from django.conf import settings
+from formsfive.attributes import EMPTY_VALUES
+from formsfive.utils import cached_reverse
 from formsfive.widgets import HTML5Input
 from formsfive import widgets
 
@@ -125,8 +130,8 @@ class MultipleFocusWidget(widgets.SelectMultiple):
 
     def render(self, name, value, attrs=None, choices=()):
         # add url
-        add_url = reverse('generic_images_modal')
-        search_url = reverse('search_interchange_modal')
+        add_url = cached_reverse('generic_images_modal')
+        search_url = cached_reverse('search_interchange_modal')
         if attrs is None: attrs = {}
         attrs['class'] = 'multiple add'
         attrs['size'] = self.size
@@ -150,15 +155,32 @@ class MultipleFocusWidget(widgets.SelectMultiple):
             ''')
         return mark_safe(u''.join(output))
 
+    def image_urls(self):
+        '''
+        Map every option value to the url of its image with a
+        single query, instead of one query per option.
+        '''
+        queryset = getattr(self.choices, 'queryset', None)
+        if queryset is None:
+            return dict()
+        prepare_value = self.choices.field.prepare_value
+        return dict((force_unicode(prepare_value(obj)), obj.image.image.url)
+            for obj in queryset.select_related('image'))
+
+    def iter_options(self, choices, selected_choices, chunk_size=500):
+        self.images = dict()
+        if len(selected_choices) != 0:
+            self.images = self.image_urls()
+        return super(MultipleFocusWidget, self).iter_options(choices, selected_choices, chunk_size)
+
     def render_option(self, selected_choices, option_value, option_label):
         option_value = force_unicode(option_value)
         selected_html = (option_value in selected_choices) and u' selected="selected"' or ''
         if len(selected_choices) == 0:
             image = 'none'
         else:
-            # TODO - this gives you the url to see that image
-            uri = self.choices.queryset.get(pk=option_value)
-            image = uri.image.image.url
+            # this gives you the url to see that image
+            image = self.images.get(option_value, 'none')
 
         return u'<option value="%s"id="%s"%s>%s</option>' % (
             escape(option_value), image, selected_html,
@@ -200,59 +222,32 @@ class FocusSelect(widgets.Select): #TODO - change to (SelectMultiple)
 
 class DatePickerWidget(widgets.TextInput):
     '''
-    Renders all the necessary code for datepicker-addon jquery
-    field. This uses the yepnope is an asynchronous conditional resource loader.
+    Renders a datepicker-addon jquery field. The input only carries
+    data-* attributes; formsfive/js/widgets.js (see Media) starts the
+    picker, so the script is loaded and cached once per page.
     If your using this outside of the my application please:
     CHECK YOUR SETTING LOCATIONS
     '''
+    class Media:
+        css = {'all': ('%scss/theirry/jquery-ui-1.8.15.custom.css' % settings.THEIRRY_MEDIA_URL,)}
+        js = (
+            '%sjs/jquery.js' % settings.THEIRRY_MEDIA_URL,
+            '%sjs/jquery-ui-1.8.15.custom.js' % settings.THEIRRY_MEDIA_URL,
+            '%sjs/jquery-ui-timepicker-addon.js' % settings.THEIRRY_MEDIA_URL,
+            'formsfive/js/widgets.js',
+        )
+
     def render(self, name, value, attrs=None):
-        final_attrs = self.build_attrs(attrs)
-        self.options = dict()
-        self.options = {
-            'id': str(final_attrs.get('id', None)), 'static': settings.THEIRRY_MEDIA_URL
-        }
+        attrs = dict(attrs or {}, **{'data-formsfive': 'datepicker'})
+        return super(DatePickerWidget, self).render(name, value, attrs)
 
-        output = [super(DatePickerWidget, self).render(name, value, attrs)]
-        output.append(
-           u'''
-            <script>
-
-                yepnope({
-                    load:[
-                        '%(static)sjs/jquery.js', %(static)sjs/jquery-ui-1.8.15.custom.js, %(static)sjs/jquery-ui-timepicker-addon.js
-                    ],
-                    complete: function(){
-                        jQuery(function(){
-
-                            var %(id)s = $('#%(id)s');
-
-                            %(id)s.datetimepicker({
-                                timeFormat: 'hh:mm:ss TT',
-                                ampm: true,
-                                hourMin: 0,
-                                minuteMin: 0,
-                                secondMin: 0,
-                                stepMinute: 5,
-                            });
-
-                            $('#%(id)s_button').click(function(){
-                                %(id)s.datetimepicker('setDate', (new Date()) );
-                            });
-
-                        });
-                    }
-                });
-
-            </script>
-            ''' % (self.options)
-        )
-        return mark_safe(u''. join(output))
 
-        css = {
-            'all': (
-                '%scss/theirry/jquery-ui-1.8.15.custom.css' % settings.THEIRRY_MEDIA_URL,
-            )
-        }
+def autocomplete_value(value):
+    if value in EMPTY_VALUES or len(value) == 0:
+        return ''
+    if isinstance(value, QuerySet):
+        return ', '.join([v.tag.name for v in value])
+    return value
 
 
 class AutoCompleteModelWidget(widgets.TextInput):
@@ -263,6 +258,7 @@ class AutoCompleteModelWidget(widgets.TextInput):
     def __init__(self, options=dict(), *args, **kwargs):
         self.options = options
         super(AutoCompleteModelWidget, self).__init__(*args, **kwargs)
+        self.is_url = False
         if self.options.get('length') in EMPTY_VALUES:
             self.length = 2
         else:
@@ -283,92 +279,26 @@ class AutoCompleteModelWidget(widgets.TextInput):
 
     class Media:
         css = {'all': ('%scss/autocomplete.css' % settings.THEIRRY_MEDIA_URL,)}
+        js = (
+            '%sjs/jquery.js' % settings.THEIRRY_MEDIA_URL,
+            '%sjs/jquery-ui-1.8.15.custom.js' % settings.THEIRRY_MEDIA_URL,
+            'formsfive/js/widgets.js',
+        )
 
     def render(self, name, value, attrs=None):
-
-        if self.options['uri'].find('/') == -1 and self.is_url:
+        if self.is_url and self.options['uri'].find('/') == -1:
             # Some occasions the url is present, check to see if present if not preform function
             try:
-                self.uri = reverse(self.options['uri'])
+                self.uri = cached_reverse(self.options['uri'])
             except NoReverseMatch:
                 # seems to be an error -> disable search
                 self.uri = '/'
 
-        self.options = {
-            'id': attrs['id'], 'uri': self.uri,
-            'length': self.length, 'static': settings.THEIRRY_MEDIA_URL,
-        }
-
-        if value in EMPTY_VALUES or len(value) == 0:
-            value = ''
-        else:
-            complete_list = list()
-
-            if isinstance(value, QuerySet):
-                for v in value:
-                    complete_list.append(v.tag.name)
-                value = ', '.join(complete_list)
-
-            if isinstance(value, unicode):
-                pass
-
-        '''if value is not None and not isinstance(value, basestring):
-            value = edit_string_for_tags([o.tag for o in value.select_related("tag")])
-        '''
-
-        output = [super(AutoCompleteModelWidget, self).render(name, value, attrs)]
-        output.append(u'''
-            <script>
-
-                yepnope({
-                    load:[
-                        '%(static)sjs/jquery.js', '%(static)sjs/jquery-ui-1.8.15.custom.js'
-                    ],
-                    complete: function(){
-                        jQuery(function(){
-                            function split(val) {
-                                return val.split(/\s*, \s*/);
-                            }
-                            function extractLast(term) {
-                                return split(term).pop();
-                            }
-                            $('#%(id)s').autocomplete({
-                                source: function(request, response) {
-                                    $.getJSON('%(uri)s', {
-                                        term: extractLast(request.term)
-                                    }, response);
-                                },
-                                search: function() {
-                                    // custom minLength
-                                    var term = extractLast(this.value);
-                                    if (term.length < %(length)s) {
-                                        return false;
-                                    }
-                                },
-                                focus: function() {
-                                    // prevent value inserted on focus
-                                    return false;
-                                },
-                                select: function(event, ui) {
-                                    var terms = split( this.value );
-                                    // remove the current input
-                                    terms.pop();
-                                    // add the selected item
-                                    terms.push( ui.item.value );
-                                    // add placeholder to get the comma-and-space at the end
-                                    terms.push("");
-                                    this.value = terms.join(", ");
-                                    return false;
-                                }
-                            });
-                        });
-                    }
-                });
-
-            </script>
-        ''' %  (self.options))
-
-        return mark_safe(u''. join(output))
+        attrs = dict(attrs or {}, **{
+            'data-formsfive': 'autocomplete', 'data-source': self.uri,
+            'data-min-length': self.length,
+        })
+        return super(AutoCompleteModelWidget, self).render(name, autocomplete_value(value), attrs)
 
 
 class AutoCompleteTagWidget(widgets.TextInput):
@@ -387,80 +317,18 @@ class AutoCompleteTagWidget(widgets.TextInput):
 
     class Media:
         css = {'all': ('%scss/autocomplete.css' % settings.THEIRRY_MEDIA_URL,)}
+        js = (
+            '%sjs/jquery.js' % settings.THEIRRY_MEDIA_URL,
+            '%sjs/jquery-ui-1.8.15.custom.js' % settings.THEIRRY_MEDIA_URL,
+            'formsfive/js/widgets.js',
+        )
 
     def render(self, name, value, attrs=None):
-        self.options = {
-            'id': attrs['id'], 'tag_lookup': reverse('tag_lookup'),
-            'length': self.length, 'static': settings.THEIRRY_MEDIA_URL,
-        }
-
-        if value in EMPTY_VALUES or len(value) == 0:
-            value = ''
-        else:
-            complete_list = list()
-
-            if isinstance(value, QuerySet):
-                for v in value:
-                    complete_list.append(v.tag.name)
-                value = ', '.join(complete_list)
-
-            if isinstance(value, unicode):
-                pass
-
-        output = [super(AutoCompleteTagWidget, self).render(name, value, attrs)]
-        output.append(u'''
-            <script>
-                yepnope({
-                    load:[
-                       '%(static)sjs/jquery.js', '%(static)sjs/jquery-ui-1.8.15.custom.js'
-                    ],
-                    complete: function(){
-                        jQuery(function(){
-
-                            function split(val) {
-                                return val.split(/\s*, \s*/);
-                            }
-
-                            function extractLast(term) {
-                                return split(term).pop();
-                            }
-                            $('#%(id)s').autocomplete({
-                                source: function(request, response) {
-                                    $.getJSON('%(tag_lookup)s', {
-                                        term: extractLast(request.term)
-                                    }, response);
-                                },
-                                search: function() {
-                                    // custom minLength
-                                    var term = extractLast(this.value);
-                                    if (term.length < %(length)s) {
-                                        return false;
-                                    }
-                                },
-                                focus: function() {
-                                    // prevent value inserted on focus
-                                    return false;
-                                },
-                                select: function(event, ui) {
-                                    var terms = split( this.value );
-                                    // remove the current input
-                                    terms.pop();
-                                    // add the selected item
-                                    terms.push( ui.item.value );
-                                    // add placeholder to get the comma-and-space at the end
-                                    terms.push("");
-                                    this.value = terms.join(", ");
-                                    return false;
-                                }
-                            });
-
-                        });
-                    }
-                });
-            </script>
-        ''' %  (self.options))
-
-        return mark_safe(u''. join(output))
+        attrs = dict(attrs or {}, **{
+            'data-formsfive': 'autocomplete', 'data-source': cached_reverse('tag_lookup'),
+            'data-min-length': self.length,
+        })
+        return super(AutoCompleteTagWidget, self).render(name, autocomplete_value(value), attrs)
 
 
 class USPhoneNumberMultiWidget(widgets.MultiWidget):
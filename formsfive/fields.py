@@ -4,10 +4,13 @@ from django.utils.translation import ugettext_lazy as _
 from django.core.exceptions import ValidationError
 from django import forms as original
 from django.core import validators
-from formsfive.utils import check_default
-import re, inspect
+from formsfive.utils import argument_defaults, check_default, is_default
+from formsfive.spec import HTML5Spec, spec_attribute
+from formsfive.patterns import compile_pattern, escape_pattern
+from formsfive.constraints import field_constraints, get_constraints
+import copy
+import re
 
-from django.utils.html import escape
 
 from formsfive.widgets import (
 	HTML5Input, TextInput, HiddenInput, CheckboxInput, Select,
@@ -34,32 +37,129 @@ class Field(original.Field):
     pass
 
 
+class HTML5FieldMetaclass(type):
+    '''
+    Build the table of HTML5 keyword defaults once, when the field
+    class is created, instead of on every field construction.
+
+    Subclasses may add their own HTML5 keywords by declaring a
+    ``html5_attributes`` dictionary of {keyword: default}.
+    '''
+    def __new__(cls, name, bases, attrs):
+        new_class = super(HTML5FieldMetaclass, cls).__new__(cls, name, bases, attrs)
+        declared = [base.__dict__['html5_attributes'] for base in reversed(new_class.__mro__)
+            if 'html5_attributes' in base.__dict__]
+        defaults = dict()
+        for attributes in declared:
+            defaults.update(attributes)
+        # HTML5Field takes its own keywords by name, the rest come from kwargs
+        named = declared and declared[0] or {}
+        new_class.html5_defaults = defaults
+        new_class.html5_extra = tuple((key, value) for key, value in defaults.iteritems()
+            if key not in named)
+        for key, default in defaults.iteritems():
+            setattr(new_class, key, spec_attribute(key, default))
+        return new_class
+
+
+def strip_whitespace(value):
+    return value.strip()
+
+
+def collapse_whitespace(value):
+    return compile_pattern(r'\s+', re.UNICODE).sub(u' ', value).strip()
+
+
+# whitespace normalizations of string values, see HTML5Field.whitespace
+WHITESPACE = {
+    'strip': strip_whitespace,
+    'collapse': collapse_whitespace,
+    'none': None,
+    None: None,
+}
+
+
 class HTML5Field(object):
+    '''
+    ``whitespace`` normalizes string values in to_python: 'strip'
+    removes surrounding whitespace, 'collapse' also turns every inner
+    run into one space and 'none' keeps the value as submitted.
+    Left unset it is 'none', except in HTML5ModelForm, which strips.
+    '''
+    __metaclass__ = HTML5FieldMetaclass
+    html5 = HTML5Spec.EMPTY
+    whitespace = None
     widget = HTML5Input
     hidden_widget = HiddenInput
+    default_error_messages = {
+        'max_value': _(u'Ensure this value is less than or equal to %(limit_value)s.'),
+        'min_value': _(u'Ensure this value is greater than or equal to %(limit_value)s.'),
+        'step': _(u'Ensure this value is %(base)s plus a multiple of %(step)s.'),
+        'pattern': _(u'Enter a value in the requested format.'),
+    }
 
     def __init__(
             self, placeholder=None, autofocus=False, autocapitalize='off',
             autocorrect='off', pattern=None, readonly=False, results=None,
             spellcheck='off', disabled=False, min=False, max=False, step=1, *args, **kwargs):
+        # keywords added by subclasses through html5_attributes
+        extra = [(key, kwargs.pop(key, value)) for key, value in self.html5_extra]
+        if 'whitespace' in kwargs:
+            self.whitespace = kwargs.pop('whitespace')
+            if self.whitespace not in WHITESPACE:
+                raise ValueError('whitespace must be one of %s' % ', '.join(map(repr, WHITESPACE)))
         super(HTML5Field, self).__init__(*args, **kwargs)
-        self.placeholder, self.autofocus, self.autocapitalize = placeholder, autofocus, autocapitalize
-        self.autocorrect, self.pattern, self.readonly, self.results = autocorrect, escape(pattern), readonly, results
-        self.spellcheck, self.disabled, self.min, self.max, self.step = spellcheck, disabled, min, max, step
-
-        # inspect the __init__ method and get default values
-        args, varargs, kwords, defaults = inspect.getargspec(HTML5Field.__init__)
-        g = inspect.formatargspec(args[1:], None, None, defaults)[1:-1]
-
-        check = dict()
-        # create a dictionary to check default values
-        for item in g.split(", "):
-            key, val = item.split("=")
-            check[key] = val
-
-        # compare default values and change if necessary
-        # if you find a better way feel free !! TODO !!
-        check_default(self, check)
+        if pattern is not None:
+            pattern = escape_pattern(pattern)
+            # an invalid expression fails here rather than in clean()
+            get_constraints(pattern=pattern)
+        values = [
+            ('placeholder', placeholder), ('autofocus', autofocus), ('autocapitalize', autocapitalize),
+            ('autocorrect', autocorrect), ('pattern', pattern), ('readonly', readonly),
+            ('results', results), ('spellcheck', spellcheck), ('disabled', disabled),
+            ('min', min), ('max', max), ('step', step)] + extra
+        # only keep what differs from the precomputed defaults
+        defaults = self.html5_defaults
+        self.html5 = HTML5Spec([(key, value) for key, value in values
+            if not is_default(value, defaults[key])])
+        check_default(self)
+
+    html5_attributes = argument_defaults(__init__)
+
+    def to_python(self, value):
+        value = super(HTML5Field, self).to_python(value)
+        normalize = WHITESPACE[self.whitespace]
+        if normalize is not None and isinstance(value, basestring):
+            value = normalize(value)
+        return value
+
+    def run_validators(self, value):
+        '''
+        Besides the field's validators, enforce the min, max, step
+        and pattern the browser was told about (see constraints).
+        '''
+        if self.validators:
+            super(HTML5Field, self).run_validators(value)
+        if value in validators.EMPTY_VALUES:
+            return
+        error = field_constraints(self).error(value)
+        if error is not None:
+            code, params = error
+            raise ValidationError(self.error_messages[code] % params)
+
+    def __deepcopy__(self, memo):
+        '''
+        Copy the widget, validators and choices list; everything else,
+        including the HTML5 spec and the choice tuples, is shared.
+        '''
+        result = self.__class__.__new__(self.__class__)
+        result.__dict__ = self.__dict__.copy()
+        memo[id(self)] = result
+        result.widget = copy.deepcopy(self.widget, memo)
+        result.validators = self.validators[:]
+        if '_choices' in self.__dict__:
+            result._choices = list(self._choices)
+        return result
 
 
 class PasswordField(HTML5Field, original.CharField):
@@ -167,13 +267,11 @@ class RegexField(CharField):
             error_messages = kwargs.get('error_messages') or {}
             error_messages['invalid'] = error_message
             kwargs['error_messages'] = error_messages
-        pattern = regex
         super(RegexField, self).__init__(*args, **kwargs)
-        if isinstance(regex, basestring):
-            regex = re.compile(regex)
-        self.regex = regex
-        self.widget.pattern = pattern
-        self.validators.append(validators.RegexValidator(regex=regex))
+        # the pattern attribute and the validator share one expression
+        self.regex = compile_pattern(regex)
+        self.widget.pattern = self.regex.pattern
+        self.validators.append(validators.RegexValidator(regex=self.regex))
 
 
 class IPAddressField(HTML5Field, original.IPAddressField):
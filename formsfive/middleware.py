@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+from formsfive.models import start_choice_cache, end_choice_cache
+
+
+class ChoiceCacheMiddleware(object):
+    '''
+    Share evaluated model choices between all forms of a request,
+    see formsfive.models.choice_cache.
+    '''
+    def process_request(self, request):
+        start_choice_cache()
+
+    def process_response(self, request, response):
+        end_choice_cache()
+        return response
+
+    def process_exception(self, request, exception):
+        end_choice_cache()
@@ -5,18 +5,99 @@ from django.utils.datastructures import SortedDict
 from django.forms.widgets import media_property
 from django.core.exceptions import FieldError
 from django.forms import models as original
+from django.db.models.sql.datastructures import EmptyResultSet
+from contextlib import contextmanager
 from formsfive import fields as five
 from django.db import models
+import threading
+import copy
 
 
-__all__ = ('ModelChoiceField', 'ModelMultipleChoiceField', 'HTML5ModelForm')
+__all__ = ('ModelChoiceField', 'ModelMultipleChoiceField', 'HTML5ModelForm', 'choice_cache', 'register_dbfield')
 
+_choice_cache = threading.local()
 
-class ModelChoiceField(original.ModelChoiceField):
+
+def start_choice_cache():
+    _choice_cache.choices = dict()
+
+
+def end_choice_cache():
+    _choice_cache.choices = None
+
+
+@contextmanager
+def choice_cache():
+    '''
+    Evaluate every model choice queryset at most once inside the block;
+    fields rendering the same query (e.g. all rows of a formset) share
+    the choices. ChoiceCacheMiddleware does the same per request.
+    '''
+    previous = getattr(_choice_cache, 'choices', None)
+    if previous is None:
+        start_choice_cache()
+    try:
+        yield
+    finally:
+        if previous is None:
+            end_choice_cache()
+
+
+class CachedModelChoiceIterator(original.ModelChoiceIterator):
+    '''
+    ModelChoiceIterator that shares evaluated choices through the
+    active choice cache, keyed on the queryset's SQL and parameters.
+    '''
+    def __iter__(self):
+        if self.field.cache_choices:
+            for choice in super(CachedModelChoiceIterator, self).__iter__():
+                yield choice
+            return
+        if self.field.empty_label is not None:
+            yield (u"", self.field.empty_label)
+        for choice in self.model_choices():
+            yield choice
+
+    def model_choices(self):
+        queryset = self.queryset.all()
+        if self.field.only:
+            # only load the columns needed for value and label
+            queryset = queryset.only(*self.field.only)
+        cache = getattr(_choice_cache, 'choices', None)
+        if cache is None:
+            return [self.choice(obj) for obj in queryset]
+        try:
+            sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+        except EmptyResultSet:
+            return []
+        key = (self.field.__class__, self.field.to_field_name, queryset.db, sql, repr(tuple(params)))
+        if key not in cache:
+            cache[key] = [self.choice(obj) for obj in queryset]
+        return cache[key]
+
+
+class CachedChoicesMixin(object):
+    '''
+    ``only`` optionally limits the columns loaded to render the
+    choices, e.g. only=('pk', 'name') when the label is the name.
+    '''
+    def __init__(self, *args, **kwargs):
+        self.only = kwargs.pop('only', None)
+        super(CachedChoicesMixin, self).__init__(*args, **kwargs)
+
+    def _get_choices(self):
+        if hasattr(self, '_choices'):
+            return self._choices
+        return CachedModelChoiceIterator(self)
+
+    choices = property(_get_choices, original.ModelChoiceField.choices.fset)
+
+
+class ModelChoiceField(CachedChoicesMixin, original.ModelChoiceField):
     widget = Select
 
 
-class ModelMultipleChoiceField(original.ModelMultipleChoiceField):
+class ModelMultipleChoiceField(CachedChoicesMixin, original.ModelMultipleChoiceField):
     widget = SelectMultiple
 
 
@@ -49,11 +130,77 @@ HTML5FIELD_FOR_DBFIELD = {
 }
 
 
+_resolved = dict()
+
+
+def register_dbfield(db_field_class, defaults):
+    '''
+    Use ``defaults`` (formfield() keywords, e.g. {'form_class': CharField})
+    for ``db_field_class`` and its subclasses. None keeps Django's own
+    form field for them.
+    '''
+    HTML5FIELD_FOR_DBFIELD[db_field_class] = defaults
+    _resolved.clear()
+    _formfields.clear()
+
+
+def formfield_defaults(db_field_class):
+    '''
+    The HTML5FIELD_FOR_DBFIELD entry of the closest class in the MRO of
+    ``db_field_class``, resolved once per class.
+    '''
+    try:
+        return _resolved[db_field_class]
+    except KeyError:
+        defaults = {}
+        for klass in db_field_class.__mro__:
+            if klass in HTML5FIELD_FOR_DBFIELD:
+                defaults = HTML5FIELD_FOR_DBFIELD[klass] or {}
+                break
+        return _resolved.setdefault(db_field_class, defaults)
+
+
+_model_fields = dict()
+_formfields = dict()
+
+
+def model_fields(model):
+    '''
+    The sorted fields and many to many fields of ``model``.
+    '''
+    try:
+        return _model_fields[model]
+    except KeyError:
+        opts = model._meta
+        return _model_fields.setdefault(model, sorted(opts.fields + opts.many_to_many))
+
+
+def model_formfield(model, db_field, widget=None):
+    '''
+    A copy of the HTML5 form field of ``db_field``. The field is built
+    once per model, field and widget, so every form class of a model
+    (whatever its fields and exclude) shares the work.
+    '''
+    key = (model, db_field.name, widget)
+    try:
+        formfield = _formfields[key]
+    except KeyError:
+        kwargs = widget is not None and {'widget': widget} or {}
+        # Change the dbfield to the html5 forms
+        formfield = db_field.formfield(**dict(formfield_defaults(db_field.__class__), **kwargs))
+        _formfields[key] = formfield
+    return copy.deepcopy(formfield)
+
+
 class _BaseForm(object):
     def clean(self):
-        for field in self.cleaned_data:
-            if isinstance(self.cleaned_data[field], basestring):
-                self.cleaned_data[field] = self.cleaned_data[field].strip()
+        # HTML5 fields normalized their value in to_python, unless they
+        # were added after the class was built (e.g. in __init__)
+        for name, field in self.fields.items():
+            if isinstance(field, five.HTML5Field) and field.whitespace is not None:
+                continue
+            if isinstance(self.cleaned_data.get(name), basestring):
+                self.cleaned_data[name] = self.cleaned_data[name].strip()
         return self.cleaned_data
 
 
@@ -72,8 +219,7 @@ def fields_for_model(model, fields=None, exclude=None, widgets=None, formfield_c
     """
     field_list = []
     ignored = []
-    opts = model._meta
-    for f in sorted(opts.fields + opts.many_to_many):
+    for f in model_fields(model):
         if not f.editable:
             continue
         if fields is not None and not f.name in fields:
@@ -86,12 +232,7 @@ def fields_for_model(model, fields=None, exclude=None, widgets=None, formfield_c
             kwargs = {}
 
         if formfield_callback is None:
-            try:
-                # Change the dbfield to the html5 forms
-                kwargs = dict(HTML5FIELD_FOR_DBFIELD[f.__class__], **kwargs)
-            except:
-                kwargs = {}
-            formfield = f.formfield(**kwargs)
+            formfield = model_formfield(model, f, kwargs.get('widget'))
         elif not callable(formfield_callback):
             raise TypeError('formfield_callback must be a function or callable')
         else:
@@ -144,6 +285,12 @@ class HTML5ModelFormMetaclass(type):
             fields.update(declared_fields)
         else:
             fields = declared_fields
+        # model forms strip the values of fields that did not choose, on
+        # copies: declared fields may be shared with other form classes
+        for key, field in fields.items():
+            if isinstance(field, five.HTML5Field) and field.whitespace is None:
+                field = fields[key] = copy.deepcopy(field)
+                field.whitespace = 'strip'
         new_class.declared_fields = declared_fields
         new_class.base_fields = fields
         return new_class
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+from django.utils.html import escape, conditional_escape
+from django.utils.encoding import force_unicode
+from django.utils.functional import Promise
+from django.utils.hashcompat import md5_constructor
+from django.utils import translation
+from itertools import chain
+
+SELECTED = u' selected="selected"'
+
+
+class CompiledOptions(object):
+    '''
+    Pre-escaped <option> markup for a static list of choices.
+
+    The markup is built once; rendering only patches the selected
+    attribute into the rows of the current values and joins.
+    Instances are never mutated after they are built so widget
+    copies can safely share them.
+    '''
+    def __init__(self, choices, extra=()):
+        self.choices, self.extra = choices[:], tuple(extra)
+        self.language = None
+        self.lines = list()
+        self.positions = dict()
+        for option_value, option_label in chain(self.choices, self.extra):
+            if isinstance(option_label, (list, tuple)):
+                self.lines.append(u'<optgroup label="%s">' % escape(force_unicode(option_value)))
+                for option in option_label:
+                    self.add(*option)
+                self.lines.append(u'</optgroup>')
+            else:
+                self.add(option_value, option_label)
+        self.output = u'\n'.join(self.lines)
+        # identifies this version of the choices, e.g. in cache keys
+        self.digest = md5_constructor(self.output.encode('utf-8')).hexdigest()
+
+    def add(self, option_value, option_label):
+        if isinstance(option_label, Promise):
+            # translated labels are only valid for the active language
+            self.language = translation.get_language()
+        option_value = force_unicode(option_value)
+        prefix = u'<option value="%s"' % escape(option_value)
+        self.positions.setdefault(option_value, []).append((len(self.lines), len(prefix)))
+        self.lines.append(u'%s>%s</option>' % (prefix, conditional_escape(force_unicode(option_label))))
+
+    def matches(self, choices, extra=()):
+        '''
+        Lists compare element by element with an identity shortcut,
+        so checking unchanged choices is cheap.
+        '''
+        if self.language is not None and self.language != translation.get_language():
+            return False
+        return self.choices == choices and self.extra == tuple(extra)
+
+    def render(self, selected_choices):
+        '''
+        ``selected_choices`` is a set of unicode values.
+        '''
+        hits = [hit for value in selected_choices for hit in self.positions.get(value, ())]
+        if not hits:
+            return self.output
+        lines = self.lines[:]
+        for index, split in hits:
+            line = lines[index]
+            lines[index] = line[:split] + SELECTED + line[split:]
+        return u'\n'.join(lines)
+
+
+def get_compiled_options(widget, choices=()):
+    '''
+    Return the compiled options of a widget's static choices, or None
+    when the choices are dynamic (e.g. a queryset). The result is stored
+    on the widget so copies made for each form instance share it.
+    '''
+    if not isinstance(widget.choices, (list, tuple)) or not isinstance(choices, (list, tuple)):
+        return None
+    options = widget.__dict__.get('_compiled_options')
+    if options is None or not options.matches(widget.choices, choices):
+        options = widget._compiled_options = CompiledOptions(widget.choices, choices)
+    return options
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+'''
+One compiled expression per pattern for the whole process, so the
+HTML ``pattern`` attribute of a widget and the RegexValidator of its
+field are built from the very same string and compiled only once.
+
+Unlike the re module's own cache, which is emptied whenever it holds
+100 expressions, entries here are never dropped; it is meant for the
+static patterns declared on fields and widgets.
+'''
+from django.utils.html import escape
+import re
+
+_compiled = dict()
+_escaped = dict()
+_sources = dict()
+
+
+def compile_pattern(pattern, flags=0):
+    '''
+    Return the shared compiled expression of ``pattern``. Compiled
+    expressions are returned unchanged.
+    '''
+    if not isinstance(pattern, basestring):
+        return pattern
+    key = (type(pattern), pattern, flags)
+    try:
+        return _compiled[key]
+    except KeyError:
+        return _compiled.setdefault(key, re.compile(pattern, flags))
+
+
+def escape_pattern(pattern):
+    '''
+    The HTML escaped form of ``pattern`` for the pattern attribute.
+    '''
+    if not isinstance(pattern, basestring):
+        pattern = pattern.pattern
+    try:
+        return _escaped[pattern]
+    except KeyError:
+        escaped = _escaped.setdefault(pattern, escape(pattern))
+        _sources.setdefault(escaped, pattern)
+        return escaped
+
+
+def source_pattern(escaped):
+    '''
+    The pattern escape_pattern() turned into ``escaped``.
+    '''
+    return _sources.get(escaped, escaped)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+from itertools import chain
+
+
+class HTML5Spec(object):
+    '''
+    An immutable, hashable set of HTML5 attribute values.
+
+    A field and its widget share one spec. Assigning an attribute
+    replaces the spec of that one object (copy-on-write), so the
+    copies made for every form instance keep pointing at the same
+    spec instead of duplicating each value.
+    '''
+    __slots__ = ('values',)
+
+    def __init__(self, values=()):
+        object.__setattr__(self, 'values', dict(values))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('%s is immutable' % self.__class__.__name__)
+
+    __delattr__ = __setattr__
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def items(self):
+        return self.values.items()
+
+    def __contains__(self, key):
+        return key in self.values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __eq__(self, other):
+        return isinstance(other, HTML5Spec) and self.values == other.values
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(frozenset(self.values.iteritems()))
+
+    def __repr__(self):
+        return '<%s %r>' % (self.__class__.__name__, self.values)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (self.__class__, (self.values.items(),))
+
+    def replace(self, **values):
+        '''
+        Return a spec with ``values`` changed, or this one if nothing changes.
+        '''
+        if all(key in self.values and self.values[key] is value for key, value in values.iteritems()):
+            return self
+        return self.__class__(chain(self.values.iteritems(), values.iteritems()))
+
+    def without(self, key):
+        return self.__class__((k, v) for k, v in self.values.iteritems() if k != key)
+
+    def merge(self, other):
+        '''
+        Values of ``other`` win. When either side is empty the other
+        spec itself is returned, so it stays shared.
+        '''
+        if not other:
+            return self
+        if not self:
+            return other
+        return self.__class__(chain(self.values.iteritems(), other.values.iteritems()))
+
+
+HTML5Spec.EMPTY = HTML5Spec()
+
+
+def spec_attribute(key, default=None):
+    '''
+    A property storing ``key`` in the ``html5`` spec of its object.
+    '''
+    def get(self):
+        return self.html5.get(key, default)
+
+    def set(self, value):
+        self.html5 = self.html5.replace(**{key: value})
+
+    def delete(self):
+        self.html5 = self.html5.without(key)
+
+    return property(get, set, delete)
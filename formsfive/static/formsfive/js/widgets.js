@@ -0,0 +1,99 @@
+/*
+ * Starts the formsfive widgets from their data-* attributes:
+ *
+ *   data-formsfive="datepicker"     DatePickerWidget
+ *   data-formsfive="autocomplete"   AutoCompleteModelWidget, AutoCompleteTagWidget
+ *       data-source      url answering ?term=... with json
+ *       data-min-length  letters typed before searching
+ *
+ * Needs jquery and jquery-ui, which the widgets list before this
+ * file in their Media.
+ *
+ * Widgets present on DOM ready are started automatically. Start the
+ * ones added later (e.g. a new formset row) with
+ *
+ *   formsfive.init(row);
+ *
+ * Widgets that were already started are skipped.
+ */
+(function($){
+
+    function split(val) {
+        return val.split(/\s*, \s*/);
+    }
+
+    function extractLast(term) {
+        return split(term).pop();
+    }
+
+    function datepicker(input) {
+        input.datetimepicker({
+            timeFormat: 'hh:mm:ss TT',
+            ampm: true,
+            hourMin: 0,
+            minuteMin: 0,
+            secondMin: 0,
+            stepMinute: 5
+        });
+
+        $('#' + input.attr('id') + '_button').click(function(){
+            input.datetimepicker('setDate', (new Date()) );
+        });
+    }
+
+    function autocomplete(input) {
+        var source = input.data('source'),
+            length = parseInt(input.data('min-length'), 10) || 2;
+
+        input.autocomplete({
+            source: function(request, response) {
+                $.getJSON(source, {
+                    term: extractLast(request.term)
+                }, response);
+            },
+            search: function() {
+                // custom minLength
+                var term = extractLast(this.value);
+                if (term.length < length) {
+                    return false;
+                }
+            },
+            focus: function() {
+                // prevent value inserted on focus
+                return false;
+            },
+            select: function(event, ui) {
+                var terms = split( this.value );
+                // remove the current input
+                terms.pop();
+                // add the selected item
+                terms.push( ui.item.value );
+                // add placeholder to get the comma-and-space at the end
+                terms.push("");
+                this.value = terms.join(", ");
+                return false;
+            }
+        });
+    }
+
+    var widgets = {datepicker: datepicker, autocomplete: autocomplete};
+
+    function init(container) {
+        var inputs = $(container || document);
+        inputs.filter('[data-formsfive]').add(inputs.find('[data-formsfive]')).each(function(){
+            var input = $(this),
+                start = widgets[input.data('formsfive')];
+            if (start && !input.data('formsfive-ready')) {
+                input.data('formsfive-ready', true);
+                start(input);
+            }
+        });
+    }
+
+    window.formsfive = $.extend(window.formsfive || {}, {init: init});
+
+    $(function(){
+        init(document);
+    });
+
+})(jQuery);
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+'''
+Stream forms chunk by chunk instead of building one big string, e.g.:
+
+    return HttpResponse(iter_form(form))
+'''
+from django.utils.encoding import force_unicode
+from django.utils.html import conditional_escape
+from formsfive.utils import render_chunks
+
+__all__ = ('iter_field', 'iter_form')
+
+ROWS = {
+    'p': (u'<p%(html_class_attr)s>%(label)s %(field)s%(help_text)s</p>', u'%s', '</p>',
+          u' <span class="helptext">%s</span>', True),
+    'ul': (u'<li%(html_class_attr)s>%(errors)s%(label)s %(field)s%(help_text)s</li>',
+           u'<li>%s</li>', '</li>', u' <span class="helptext">%s</span>', False),
+    'table': (u'<tr%(html_class_attr)s><th>%(label)s</th><td>%(errors)s%(field)s%(help_text)s</td></tr>',
+              u'<tr><td colspan="2">%s</td></tr>', u'</td></tr>',
+              u'<br /><span class="helptext">%s</span>', False),
+}
+
+
+def iter_field(bound_field):
+    '''
+    Yield the chunks of a BoundField, like unicode(bound_field).
+    '''
+    widget = bound_field.field.widget
+    attrs = {}
+    if bound_field.auto_id and 'id' not in widget.attrs:
+        attrs['id'] = bound_field.auto_id
+    for chunk in render_chunks(widget, bound_field.html_name, bound_field.value(), attrs):
+        yield chunk
+    if bound_field.field.show_hidden_initial:
+        yield bound_field.as_hidden(only_initial=True)
+
+
+def iter_form(form, style='p'):
+    '''
+    Yield the same markup as form.as_p() (or as_ul/as_table for
+    ``style``) without waiting for every field to render.
+    '''
+    normal_row, error_row, row_ender, help_text_html, errors_on_separate_row = ROWS[style]
+    top_errors = form.non_field_errors()
+    visible, hidden_fields = [], []
+
+    # hidden fields are small and their errors belong at the top
+    for name, field in form.fields.items():
+        bf = form[name]
+        bf_errors = form.error_class([conditional_escape(error) for error in bf.errors])
+        if bf.is_hidden:
+            if bf_errors:
+                top_errors.extend([u'(Hidden field %s) %s' % (name, force_unicode(e)) for e in bf_errors])
+            hidden_fields.append(unicode(bf))
+        else:
+            visible.append((bf, bf_errors))
+    str_hidden = u''.join(hidden_fields)
+
+    separator = u''
+    if top_errors:
+        errors = error_row % force_unicode(top_errors)
+        if str_hidden and not visible and errors.endswith(row_ender):
+            # like _html_output, the hidden fields go into the last row
+            yield errors[:-len(row_ender)] + str_hidden + row_ender
+            return
+        yield errors
+        separator = u'\n'
+
+    before, after = normal_row.split(u'%(field)s')
+    for i, (bf, bf_errors) in enumerate(visible):
+        css_classes = bf.css_classes()
+        html_class_attr = css_classes and u' class="%s"' % css_classes or u''
+
+        if errors_on_separate_row and bf_errors:
+            yield separator + error_row % force_unicode(bf_errors)
+            separator = u'\n'
+
+        if bf.label:
+            label = conditional_escape(force_unicode(bf.label))
+            # Only add the suffix if the label does not end in
+            # punctuation.
+            if form.label_suffix:
+                if label[-1] not in ':?.!':
+                    label += form.label_suffix
+            label = bf.label_tag(label) or u''
+        else:
+            label = u''
+
+        if bf.field.help_text:
+            help_text = help_text_html % force_unicode(bf.field.help_text)
+        else:
+            help_text = u''
+
+        context = {
+            'errors': force_unicode(bf_errors),
+            'label': force_unicode(label),
+            'help_text': help_text,
+            'html_class_attr': html_class_attr
+        }
+        yield separator + before % context
+        separator = u'\n'
+        for chunk in iter_field(bf):
+            yield chunk
+        end = after % context
+        if str_hidden and i == len(visible) - 1:
+            # Insert any hidden fields in the last row.
+            end = end[:-len(row_ender)] + str_hidden + row_ender
+        yield end
+
+    if str_hidden and not visible:
+        if top_errors:
+            empty = normal_row % {'errors': '', 'label': '', 'field': '',
+                                  'help_text': '', 'html_class_attr': ''}
+            yield separator + empty[:-len(row_ender)] + str_hidden + row_ender
+        else:
+            yield str_hidden
@@ -1,8 +1,9 @@
 #!/usr/bin/env python
 from django.test import TestCase
+from django.core.urlresolvers import NoReverseMatch
 from django.db import models
 import formsfive as forms
-import datetime, os
+import datetime, os, re
 
 
 class FormsFiveTest(TestCase):
@@ -397,7 +398,7 @@ class FormsFiveTest(TestCase):
         self.assertFalse('checked' in rendered, rendered)
 
         rendered = RadioForm(data={'radio': 'fr'}).as_p()
-        self.assertTrue('checked="checked" type="radio" id="id_radio_2" value="fr" name="radio" required> Francais' in rendered, rendered)
+        self.assertTrue('type="radio" name="radio" id="id_radio_2" value="fr" checked="checked" required> Francais' in rendered, rendered)
 
     def test_slug(self):
         """<input type="text" pattern="[-\w]+">"""
@@ -634,3 +635,831 @@ class FormsFiveTest(TestCase):
         self.assertTrue('list="hockey"' in rendered)
         self.assertTrue('<datalist' in rendered)
         self.assertTrue('Winnipeg</option>' in rendered)
+
+    def test_html5_defaults(self):
+        """HTML5 keyword defaults are computed once per field class"""
+        self.assertEquals(forms.CharField.html5_defaults['step'], 1)
+        self.assertEquals(forms.CharField.html5_defaults['placeholder'], None)
+
+        class InputModeField(forms.CharField):
+            html5_attributes = {'inputmode': None}
+
+        self.assertTrue('inputmode' in InputModeField.html5_defaults)
+        self.assertFalse('inputmode' in forms.CharField.html5_defaults)
+
+        field = InputModeField(inputmode='numeric', min=0)
+        self.assertEquals(field.widget.inputmode, 'numeric')
+        self.assertEquals(field.widget.min, 0)
+        self.assertFalse(hasattr(forms.CharField().widget, 'inputmode'))
+
+    def test_default_spellcheck(self):
+        """String defaults such as spellcheck="off" are rendered"""
+        self.assertEquals(forms.CharField().widget.render('text', None, None),
+            u'<input pattern="^[\\w\\s]+" spellcheck="off" name="text" type="text" required>')
+        # widgets without attributes of their own render the text ones
+        self.assertTrue('spellcheck="off"' in forms.DateField().widget.render('date', None, None))
+
+    def test_attribute_plan(self):
+        """Widget classes carry a precompiled attribute plan"""
+        self.assertEquals(forms.PasswordInput.attribute_plan,
+            ('pattern', 'readonly', 'placeholder', 'autocomplete', 'required', 'maxlength', 'list'))
+        self.assertEquals(forms.RadioSelect.attribute_plan, ('autocomplete', 'required'))
+        self.assertTrue('step' in forms.NumberInput.attribute_plan)
+        self.assertFalse('step' in forms.TextInput.attribute_plan)
+
+        widget = forms.NumberInput()
+        widget.step = 5
+        self.assertEquals(widget.attribute_plan.count('list'), 1)
+        self.assertTrue('step="5"' in widget.render('num', None), widget.render('num', None))
+
+    def test_select_compiled_options(self):
+        """Static choices are pre-escaped once and shared by copies"""
+        import copy
+
+        choices = [(i, u'Option <%s>' % i) for i in range(50)]
+        choices.append(('group', ((u'\xe9', u'\xc9t\xe9'), ('a&b', 'A & B'))))
+
+        class SlowSelect(forms.Select):
+            def render_option(self, *args):
+                return super(SlowSelect, self).render_option(*args)
+
+        fast, slow = forms.Select(choices=choices), SlowSelect(choices=choices)
+        for value in (None, 3, u'\xe9', 'a&b', 'missing'):
+            self.assertEquals(fast.render('s', value), slow.render('s', value))
+        self.assertTrue('<option value="3" selected="selected">Option &lt;3&gt;</option>'
+                        in fast.render('s', 3))
+        self.assertEquals(slow.compiled_options(), None)
+
+        widget = copy.deepcopy(fast)
+        self.assertTrue(widget.compiled_options() is fast.compiled_options())
+
+        widget.choices.append(('new', 'New'))
+        self.assertTrue('<option value="new">New</option>' in widget.render('s', None))
+        self.assertFalse(widget.compiled_options() is fast._compiled_options)
+
+    def test_fragment_cache(self):
+        """Opt-in fragment cache for widgets with static choices"""
+        from formsfive import cache
+
+        CHOICES = [('en', 'English'), ('de', 'Deutsch')]
+        calls = []
+
+        class CountingSelect(forms.Select):
+            cache_fragments = True
+
+            def render_iter(self, *args):
+                calls.append(args)
+                return super(CountingSelect, self).render_iter(*args)
+
+        widget = CountingSelect(choices=CHOICES)
+        first = widget.render('lang', 'en', {'id': 'id_lang'})
+        self.assertEquals(first, widget.render('lang', 'en', {'id': 'id_lang'}))
+        self.assertEquals(len(calls), 1)
+        self.assertTrue('value="en" selected' in first, first)
+
+        # selected values, attrs and choices are part of the key
+        self.assertTrue('value="de" selected' in widget.render('lang', 'de', {'id': 'id_lang'}))
+        widget.render('lang', 'en', {'id': 'other'})
+        widget.choices.append(('fr', 'Francais'))
+        self.assertTrue('value="fr"' in widget.render('lang', 'en', {'id': 'id_lang'}))
+        self.assertEquals(len(calls), 4)
+
+        cache.invalidate_fragments()
+        widget.render('lang', 'en', {'id': 'id_lang'})
+        self.assertEquals(len(calls), 5)
+
+        # the generation lives in the cache, so another process sharing
+        # it (simulated by bumping it directly) invalidates ours
+        backend = cache.get_fragment_cache()
+        backend.incr(cache.GENERATION_KEY)
+        widget.render('lang', 'en', {'id': 'id_lang'})
+        self.assertEquals(len(calls), 6)
+        widget.render('lang', 'en', {'id': 'id_lang'})
+        self.assertEquals(len(calls), 6)
+        backend.delete(cache.GENERATION_KEY)
+        widget.render('lang', 'en', {'id': 'id_lang'})
+        self.assertEquals(len(calls), 7)
+
+        # NullBooleanSelect maps True and 1 to Yes but u'1' to Unknown
+        widget = forms.NullBooleanSelect()
+        widget.cache_fragments = True
+        for value, selected in ((True, u'2'), (u'1', u'1'), (1, u'2'), (u'True', u'1'), (0, u'3'), (u'0', u'1')):
+            rendered = widget.render('nb', value)
+            self.assertTrue(u'value="%s" selected' % selected in rendered, (value, rendered))
+
+        # radio choices are digested without building their options
+        widget = forms.RadioSelect(choices=CHOICES)
+        widget.cache_fragments = True
+        self.assertEquals(widget.render('lang', 'en'), widget.render('lang', 'en'))
+        self.assertFalse('_compiled_options' in widget.__dict__)
+        widget.choices.append(('fr', 'Francais'))
+        self.assertTrue('value="fr"' in widget.render('lang', 'en'))
+
+        lru = cache.LRULocMemCache('formsfive-test-lru', {'OPTIONS': {'MAX_ENTRIES': 2}})
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEquals((lru.get('a'), lru.get('b'), lru.get('c')), (1, None, 3))
+
+    def test_cb_multiple_rows(self):
+        """CheckboxSelectMultiple renders every row from one template"""
+        CHOICES = [(i, 'Permission %s' % i) for i in range(300)]
+        widget = forms.CheckboxSelectMultiple(choices=CHOICES)
+
+        rendered = widget.render('perms', [3, '250'], {'id': 'id_perms', 'disabled': True})
+        self.assertEquals(rendered.count('<li>'), 300)
+        self.assertEquals(rendered.count('checked="checked"'), 2)
+        self.assertEquals(rendered.count(' disabled>'), 300)
+        self.assertFalse('check_test' in rendered, rendered)
+        self.assertTrue('<li><label for="id_perms_3"><input type="checkbox" name="perms" '
+                        'checked="checked" value="3" id="id_perms_3" disabled> Permission 3</label></li>'
+                        in rendered, rendered)
+
+        # every row lists type, name, checked, value and id in that order
+        widget = forms.CheckboxSelectMultiple(choices=[('en', 'English'), ('fr', 'Fran<ais')])
+        self.assertEquals(widget.render('langs', ['fr'], {'id': 'id_langs'}), u'<ul>\n'
+            u'<li><label for="id_langs_0"><input type="checkbox" name="langs" value="en" id="id_langs_0" >'
+            u' English</label></li>\n'
+            u'<li><label for="id_langs_1"><input type="checkbox" name="langs" checked="checked" value="fr" '
+            u'id="id_langs_1" > Fran&lt;ais</label></li>\n</ul>')
+
+    def test_radio_rows(self):
+        """RadioSelect rows can be consumed lazily"""
+        CHOICES = (('en', 'English'), ('de', 'Deutsch'), ('fr', '<Francais>'))
+
+        class RadioForm(forms.Form):
+            radio = forms.ChoiceField(choices=CHOICES, widget=forms.RadioSelect)
+
+        widget = RadioForm.base_fields['radio'].widget
+        rows = widget.rows('radio', 'de', {'id': 'id_radio'})
+        self.assertEquals(rows.next()[:3], (0, u'en', u' for="id_radio_0"'))
+
+        radios = list(RadioForm(data={'radio': 'fr'})['radio'])
+        self.assertEquals(len(radios), 3)
+        self.assertTrue(radios[2].is_checked())
+        self.assertEquals(radios[2].choice_label, '&lt;Francais&gt;')
+        self.assertTrue(unicode(radios[2]).startswith('<label><input '), unicode(radios[2]))
+        self.assertTrue('value="fr" checked="checked" required>' in radios[2].tag(), radios[2].tag())
+
+        attrs = {'id': 'id_radio'}
+        widget.render('radio', None, attrs)
+        self.assertEquals(attrs, {'id': 'id_radio'})
+
+    def test_render_iter(self):
+        """Widgets and forms can be rendered as a stream of chunks"""
+        CHOICES = [(i, 'Option %s' % i) for i in range(1200)]
+
+        class StreamForm(forms.Form):
+            text = forms.CharField(help_text='Some <help>')
+            select = forms.ChoiceField(choices=CHOICES)
+            multi = forms.MultipleChoiceField(choices=CHOICES[:5], widget=forms.CheckboxSelectMultiple)
+            radio = forms.ChoiceField(choices=CHOICES[:3], widget=forms.RadioSelect)
+            split = forms.SplitDateTimeField(required=False)
+            datalist = forms.ChoiceField(choices=CHOICES[:3], widget=forms.DataListInput)
+            nb = forms.NullBooleanField()
+            hide = forms.CharField(widget=forms.HiddenInput())
+
+        for form in (StreamForm(), StreamForm(data={'select': '3', 'multi': ['1', '2'], 'nb': True})):
+            self.assertEquals(u''.join(forms.iter_form(form)), form.as_p())
+            self.assertEquals(u''.join(forms.iter_form(form, 'ul')), form.as_ul())
+            self.assertEquals(u''.join(forms.iter_form(form, 'table')), form.as_table())
+
+        class HiddenOnlyForm(forms.Form):
+            hide = forms.CharField(widget=forms.HiddenInput())
+
+        # the hidden field errors go on top, the hidden fields into that row
+        form = HiddenOnlyForm(data={})
+        for style in ('p', 'ul', 'table'):
+            self.assertEquals(u''.join(forms.iter_form(form, style)), getattr(form, 'as_%s' % style)())
+        self.assertEquals(form.as_table().count('<tr>'), 1)
+
+        # slow path options come in chunks
+        class SlowSelect(forms.Select):
+            def render_option(self, *args):
+                return super(SlowSelect, self).render_option(*args)
+
+        widget = SlowSelect(choices=CHOICES)
+        chunks = list(widget.render_iter('select', 3))
+        self.assertTrue(len(chunks) > 3)
+        self.assertEquals(u''.join(chunks), widget.render('select', 3))
+
+    def test_multiple_focus_prefetch(self):
+        """MultipleFocusWidget looks up every image with one query"""
+
+        class Gallery(models.Model):
+            title = models.CharField(max_length=255)
+
+            def __unicode__(self):
+                return u'%s' % self.title
+
+        class Picture(object):
+            def __init__(self, url):
+                self.image = type('File', (object, ), {'url': url})
+
+        queries = []
+
+        def render(count):
+            items = []
+            for pk in range(1, count + 1):
+                item = Gallery(title='Image %s' % pk, pk=pk)
+                item.image = Picture('/media/%s.png' % pk)
+                items.append(item)
+
+            class GalleryQuerySet(models.query.QuerySet):
+                """Count the queries, no DB"""
+                def iterator(self):
+                    queries.append(self)
+                    for obj in items:
+                        yield obj
+
+                def get(self, *args, **kwargs):
+                    queries.append(self)
+                    return items[0]
+
+            class GalleryForm(forms.Form):
+                images = forms.ModelMultipleChoiceField(queryset=GalleryQuerySet(model=Gallery),
+                                                        widget=forms.MultipleFocusWidget)
+
+            del queries[:]
+            widget = GalleryForm().fields['images'].widget
+            return widget.render_options((), [1])
+
+        rendered = render(3)
+        self.assertEquals(len(queries), 2)
+        self.assertTrue('<option value="1"id="/media/1.png" selected="selected">Image 1</option>'
+                        in rendered, rendered)
+        render(300)
+        self.assertEquals(len(queries), 2)
+
+    def test_model_choice_cache(self):
+        """Fields rendering the same queryset share one evaluation"""
+
+        class Country(models.Model):
+            name = models.CharField(max_length=255)
+            notes = models.TextField()
+
+            def __unicode__(self):
+                return u'%s' % self.name
+
+        queries = []
+
+        class CountryQuerySet(models.query.QuerySet):
+            """Count the queries, no DB"""
+            def iterator(self):
+                queries.append(self)
+                for pk, name in enumerate(('Canada', 'France'), 1):
+                    yield Country(name=name, pk=pk)
+
+        class AddressForm(forms.Form):
+            country = forms.ModelChoiceField(queryset=CountryQuerySet(model=Country), only=('id', 'name'))
+            visited = forms.ModelMultipleChoiceField(queryset=CountryQuerySet(model=Country))
+
+        AddressForm().as_p()
+        self.assertEquals(len(queries), 2)
+
+        del queries[:]
+        with forms.choice_cache():
+            rows = [AddressForm(prefix='form-%s' % i).as_p() for i in range(50)]
+        self.assertEquals(len(queries), 2)
+        self.assertTrue('<option value="2">France</option>' in rows[-1], rows[-1])
+        self.assertEquals(queries[0].query.deferred_loading, (set(['id', 'name']), False))
+
+        del queries[:]
+        AddressForm().as_p()
+        self.assertEquals(len(queries), 2)
+
+    def test_cached_reverse(self):
+        """Widget urls are resolved once per URLconf"""
+        from django.test.utils import override_settings
+        from formsfive import utils
+
+        calls = []
+        reverse = utils.reverse
+
+        def counting_reverse(viewname):
+            calls.append(viewname)
+            return reverse(viewname)
+
+        utils.reverse = counting_reverse
+        try:
+            with override_settings(ROOT_URLCONF='formsfive.tests.urls'):
+                utils.clear_reverse_cache()
+                widget = forms.AutoCompleteTagWidget(attrs={'length': 3})
+                for i in range(100):
+                    rendered = widget.render('tags', None, {'id': 'id_tags_%s' % i})
+                self.assertTrue('data-source="/tags/"' in rendered, rendered)
+                self.assertEquals(calls, ['tag_lookup'])
+
+                self.assertRaises(NoReverseMatch, utils.cached_reverse, 'missing')
+                self.assertRaises(NoReverseMatch, utils.cached_reverse, 'missing')
+                self.assertEquals(calls, ['tag_lookup', 'missing'])
+
+            # clearing the cache forgets the resolved urls
+            with override_settings(ROOT_URLCONF='formsfive.tests.urls'):
+                utils.clear_reverse_cache()
+                utils.cached_reverse('tag_lookup')
+                self.assertEquals(len(calls), 3)
+        finally:
+            utils.reverse = reverse
+
+    def test_widget_scripts(self):
+        """Script widgets carry data attributes and share one static initializer"""
+        class PickerForm(forms.Form):
+            start = forms.CharField(widget=forms.DatePickerWidget())
+            end = forms.CharField(widget=forms.DatePickerWidget())
+            tags = forms.CharField(widget=forms.AutoCompleteModelWidget({'uri': '/tags/', 'length': 3}))
+
+        form = PickerForm()
+        rendered = form.as_p()
+        self.assertFalse('<script' in rendered, rendered)
+        self.assertTrue('data-formsfive="datepicker"' in unicode(form['start']), rendered)
+        tags = unicode(form['tags'])
+        self.assertTrue('data-formsfive="autocomplete"' in tags, tags)
+        self.assertTrue('data-source="/tags/"' in tags, tags)
+        self.assertTrue('data-min-length="3"' in tags, tags)
+
+        media = unicode(form.media)
+        self.assertEquals(media.count('formsfive/js/widgets.js'), 1, media)
+        self.assertEquals(media.count('jquery.js'), 1, media)
+
+    def test_timings(self):
+        """Renders and cleans are timed per field only inside timings()"""
+        class TimedForm(forms.Form):
+            text = forms.CharField(placeholder='Text')
+            lang = forms.ChoiceField(choices=(('en', 'English'), ('fr', 'Francais')))
+            stamp = forms.DateTimeField(widget=forms.SplitDateTimeWidget)
+
+        render = forms.Select.__dict__['render']
+        signals = []
+
+        def receiver(sender, **kwargs):
+            signals.append((kwargs['kind'], kwargs['name']))
+        forms.field_timed.connect(receiver)
+        try:
+            with forms.timings() as results:
+                form = TimedForm({'text': 'hello', 'lang': 'fr', 'stamp_0': '2012-01-01', 'stamp_1': '10:00'})
+                rendered = form.as_p()
+                self.assertTrue(form.is_valid(), form.errors)
+        finally:
+            forms.field_timed.disconnect(receiver)
+
+        self.assertEquals(sorted(results['render']), ['lang', 'stamp', 'text'])
+        self.assertEquals(sorted(results['clean']), ['lang', 'stamp', 'text'])
+        self.assertEquals(results['render']['stamp']['calls'], 1)
+        self.assertEquals(results['render']['lang']['bytes'], len(unicode(form['lang'])))
+        self.assertTrue(('clean', 'text') in signals, signals)
+
+        # widgets inheriting HTML5Input.render are timed too
+        class ContactForm(forms.Form):
+            email = forms.EmailField()
+            url = forms.URLField()
+
+        with forms.timings() as results:
+            ContactForm().as_p()
+        self.assertEquals(sorted(results['render']), ['email', 'url'])
+
+        # the name may be passed as a keyword
+        with forms.timings() as results:
+            forms.TextInput().render(name='kw', value='x', attrs=None)
+        self.assertEquals(results['render']['kw']['calls'], 1)
+
+        # nothing is wrapped outside the block
+        self.assertTrue(forms.Select.__dict__['render'] is render)
+        self.assertFalse('clean' in forms.fields.HTML5Field.__dict__)
+        with forms.timings():
+            pass
+        self.assertEquals(len(signals), 6)
+
+    def test_html5_spec(self):
+        """Fields and widgets share one immutable HTML5 spec, copied on write"""
+        import copy, pickle
+        from formsfive.spec import HTML5Spec
+
+        class SpecForm(forms.Form):
+            name = forms.CharField(placeholder='Name', autofocus=True)
+            units = forms.IntegerField(min=0, max=100)
+
+        field = SpecForm.base_fields['name']
+        self.assertEquals(field.placeholder, 'Name')
+        self.assertEquals(field.spellcheck, 'off')
+        self.assertEquals(field.html5, HTML5Spec([('placeholder', 'Name'), ('autofocus', True),
+            ('autocapitalize', 'off'), ('autocorrect', 'off'), ('spellcheck', 'off')]))
+        # TextInput brings its own pattern, so the widget merges both
+        self.assertEquals(field.widget.placeholder, 'Name')
+        self.assertEquals(field.widget.pattern, '^[\w\s]+')
+        units = SpecForm.base_fields['units']
+        self.assertTrue(units.widget.html5 is units.html5)
+
+        first, second = SpecForm(), SpecForm()
+        self.assertTrue(first.fields['name'].widget.html5 is field.widget.html5)
+        self.assertTrue(copy.deepcopy(units).widget.html5 is units.html5)
+
+        first.fields['units'].widget.min = 5
+        self.assertEquals(first.fields['units'].widget.min, 5)
+        self.assertEquals(second.fields['units'].widget.min, 0)
+        self.assertTrue(second.fields['units'].widget.html5 is units.html5)
+        rendered = unicode(first['units'])
+        self.assertTrue('min="5"' in rendered, rendered)
+
+        spec = field.html5
+        self.assertRaises(AttributeError, setattr, spec, 'values', {})
+        self.assertEquals(hash(spec), hash(pickle.loads(pickle.dumps(spec))))
+        self.assertTrue(spec.replace(placeholder='Name') is spec)
+
+    def test_deepcopy(self):
+        """Form instances get their own mutable widget and field state only"""
+        class CopyForm(forms.Form):
+            lang = forms.ChoiceField(choices=[('en', 'English'), ('fr', 'Francais')], placeholder='Language')
+            stamp = forms.DateTimeField(widget=forms.SplitDateTimeWidget)
+
+        first, second = CopyForm(), CopyForm()
+        lang = CopyForm.base_fields['lang']
+        self.assertFalse(first.fields['lang'] is lang)
+        self.assertTrue(first.fields['lang'].html5 is lang.html5)
+        self.assertTrue(first.fields['lang'].widget.choices is lang.widget.choices)
+
+        first.fields['lang'].choices.append(('de', 'Deutsch'))
+        first.fields['lang'].widget.attrs['class'] = 'wide'
+        self.assertEquals(len(second.fields['lang'].choices), 2)
+        self.assertEquals(len(lang.choices), 2)
+        self.assertFalse('class' in second.fields['lang'].widget.attrs)
+
+        split = first.fields['stamp'].widget
+        self.assertFalse(split.widgets[0] is second.fields['stamp'].widget.widgets[0])
+        split.widgets[0].attrs['size'] = 10
+        self.assertFalse('size' in second.fields['stamp'].widget.widgets[0].attrs)
+
+    def test_pattern_registry(self):
+        """Identical patterns compile once and feed attribute and validator"""
+        import re
+        from formsfive.patterns import compile_pattern
+
+        first = forms.RegexField(r'^\d{5}$')
+        second = forms.RegexField(re.compile(r'^\d{5}$'))
+        third = forms.RegexField(r'^\d{5}$')
+        self.assertTrue(first.regex is third.regex)
+        self.assertTrue(first.regex is compile_pattern(r'^\d{5}$'))
+        self.assertTrue(first.validators[-1].regex is first.regex)
+
+        # compiled expressions render their source, not their repr
+        rendered = second.widget.render('zip', None, {})
+        self.assertTrue('pattern="^\\d{5}$"' in rendered, rendered)
+        self.assertEquals(first.clean('12345'), '12345')
+        self.assertRaises(forms.ValidationError, first.clean, '1234')
+
+    def test_html5_constraints(self):
+        """min, max, step and pattern are enforced like the browser does"""
+        field = forms.IntegerField(max=100, min=5, step=5)
+        self.assertEquals(field.clean('10'), 10)
+        self.assertEquals(field.clean('100'), 100)
+        for value, message in (('0', 'greater than or equal to 5'), ('105', 'less than or equal to 100'),
+                               ('12', '5 plus a multiple of 5')):
+            try:
+                field.clean(value)
+            except forms.ValidationError, e:
+                self.assertTrue(message in e.messages[0], e.messages)
+            else:
+                self.fail('%s passed' % value)
+
+        # widget level values are rendered, so they are enforced too
+        class UnitsForm(forms.Form):
+            units = forms.IntegerField()
+
+            def __init__(self, *args, **kwargs):
+                super(UnitsForm, self).__init__(*args, **kwargs)
+                self.fields['units'].widget.min = 0
+                self.fields['units'].widget.max = 100
+                self.fields['units'].widget.step = 5
+
+        form = UnitsForm()
+        self.assertTrue('min="0"' in unicode(form['units']), unicode(form['units']))
+        self.assertTrue(UnitsForm({'units': '10'}).is_valid())
+        self.assertTrue(UnitsForm({'units': '0'}).is_valid())
+        for value in ('7', '-5'):
+            form = UnitsForm({'units': value})
+            self.assertFalse(form.is_valid())
+            self.assertTrue('units' in form.errors, form.errors)
+
+        # so are the widget's attrs, but not the NumberInput defaults (min 1, max 5)
+        field = forms.DecimalField(widget=forms.NumberInput(attrs={'step': 12, 'min': 12, 'max': 36}))
+        self.assertEquals(field.clean('24'), 24)
+        self.assertRaises(forms.ValidationError, field.clean, '5')
+        self.assertRaises(forms.ValidationError, field.clean, '30')
+        self.assertEquals(forms.IntegerField().clean('7'), 7)
+        self.assertEquals(forms.IntegerField().clean('-3'), -3)
+        self.assertRaises(forms.ValidationError, forms.IntegerField(max=5).clean, '7')
+        self.assertEquals(forms.IntegerField(min=0).clean('0'), 0)
+        self.assertRaises(forms.ValidationError, forms.IntegerField(min=0).clean, '-1')
+
+        code = forms.CharField(pattern='[A-Z]{3}&', required=False)
+        self.assertEquals(code.clean('ABC&'), 'ABC&')
+        self.assertEquals(code.clean(''), '')
+        self.assertRaises(forms.ValidationError, code.clean, 'xABC&')
+        # invalid expressions fail when the field is declared
+        self.assertRaises(re.error, forms.CharField, pattern='[a-')
+        # the default pattern of TextInput stays a hint
+        self.assertEquals(forms.CharField().clean('hello!'), 'hello!')
+
+    def test_validate_many(self):
+        """Many rows are validated by one form instance, in order"""
+        class RowForm(forms.Form):
+            task = forms.CharField()
+            units = forms.IntegerField(min=0, max=100, step=5)
+
+        rows = [{'task': 'Write', 'units': '10'}, {'task': '', 'units': '7'}, {'task': 'Ship', 'units': '15'}]
+        results = list(forms.validate_many(RowForm, iter(rows)))
+        self.assertEquals(results[0], ({'task': u'Write', 'units': 10}, {}))
+        self.assertEquals(results[1][0], None)
+        self.assertEquals(sorted(results[1][1]), ['task', 'units'])
+        self.assertEquals(results[1][1]['task'], [u'This field is required.'])
+        self.assertEquals(results[2], ({'task': u'Ship', 'units': 15}, {}))
+
+        # the same answers as one form per row
+        for data, (cleaned_data, errors) in zip(rows, results):
+            form = RowForm(data)
+            self.assertEquals(form.is_valid(), not errors)
+            self.assertEquals(getattr(form, 'cleaned_data', None), cleaned_data)
+
+        validator = forms.BatchValidator(RowForm, prefix='row')
+        self.assertEquals(validator.validate({'row-task': 'Prefixed', 'row-units': '0'}),
+            ({'task': u'Prefixed', 'units': 0}, {}))
+
+        # worker processes leave the caller's database connection alone
+        from django.db import connection
+        connection.cursor()
+        open_connection = connection.connection
+        self.assertEquals(list(forms.validate_many(RowForm, rows, processes=2, chunksize=1)), results)
+        self.assertTrue(connection.connection is open_connection)
+
+    def test_dbfield_resolver(self):
+        """Model field subclasses and registered types get HTML5 form fields"""
+        from formsfive.models import formfield_defaults, HTML5FIELD_FOR_DBFIELD
+
+        class CodeField(models.CharField):
+            pass
+
+        class ColorField(models.Field):
+            def get_internal_type(self):
+                return 'CharField'
+
+        class Swatch(models.Model):
+            code = CodeField(max_length=10)
+            color = ColorField()
+            ip = models.GenericIPAddressField()
+
+            class Meta:
+                app_label = 'tests'
+
+        self.assertTrue(formfield_defaults(CodeField) is HTML5FIELD_FOR_DBFIELD[models.CharField])
+
+        class SwatchForm(forms.HTML5ModelForm):
+            class Meta:
+                model = Swatch
+                widgets = {'ip': forms.TextInput(attrs={'placeholder': 'IP'})}
+
+        fields = SwatchForm.base_fields
+        self.assertTrue(isinstance(fields['code'], forms.CharField))
+        self.assertFalse(isinstance(fields['color'], forms.CharField))
+        # a widget of an unmapped field is kept
+        self.assertTrue(isinstance(fields['ip'].widget, forms.TextInput))
+
+        forms.register_dbfield(ColorField, {'form_class': forms.CharField, 'widget': forms.ColorInput})
+        try:
+            fields = type('SwatchForm', (forms.HTML5ModelForm,), {'Meta': SwatchForm.Meta}).base_fields
+            self.assertTrue(isinstance(fields['color'].widget, forms.ColorInput))
+        finally:
+            # None opts a field type out again
+            forms.register_dbfield(ColorField, None)
+        self.assertEquals(formfield_defaults(ColorField), {})
+
+    def test_model_formfield_cache(self):
+        """Form classes of one model build each form field only once"""
+        from formsfive import models as five_models
+
+        class Note(models.Model):
+            title = models.CharField(max_length=100)
+            body = models.TextField()
+            rank = models.PositiveIntegerField()
+
+            class Meta:
+                app_label = 'tests'
+
+        calls = []
+        formfield = five_models.model_formfield
+
+        def counting_formfield(model, db_field, widget=None):
+            if (model, db_field.name, widget) not in five_models._formfields:
+                calls.append(db_field.name)
+            return formfield(model, db_field, widget)
+
+        five_models.model_formfield = counting_formfield
+        try:
+            first = type('First', (forms.HTML5ModelForm,), {'Meta': type('Meta', (), {'model': Note})})
+            second = type('Second', (forms.HTML5ModelForm,),
+                {'Meta': type('Meta', (), {'model': Note, 'exclude': ('body',)})})
+        finally:
+            five_models.model_formfield = formfield
+        self.assertEquals(sorted(calls), ['body', 'id', 'rank', 'title'])
+        self.assertEquals(second.base_fields.keys(), ['title', 'rank'])
+
+        # every class still owns its fields
+        self.assertFalse(first.base_fields['title'] is second.base_fields['title'])
+        second.base_fields['title'].widget.attrs['class'] = 'wide'
+        self.assertFalse('class' in first.base_fields['title'].widget.attrs)
+        self.assertTrue(isinstance(first.base_fields['body'].widget, forms.Textarea))
+
+    def test_whitespace(self):
+        """Fields normalize whitespace in to_python, model forms strip by default"""
+        class WhitespaceForm(forms.Form):
+            plain = forms.CharField(required=False)
+            strip = forms.CharField(whitespace='strip')
+            collapse = forms.CharField(whitespace='collapse')
+            raw = forms.CharField(whitespace='none')
+
+        form = WhitespaceForm({'plain': u' a ', 'strip': u'  b \n', 'collapse': u' c \t\n d  e ', 'raw': u' f '})
+        self.assertTrue(form.is_valid())
+        self.assertEquals(form.cleaned_data, {'plain': u' a ', 'strip': u'b', 'collapse': u'c d e', 'raw': u' f '})
+        self.assertFalse('whitespace' in dict(WhitespaceForm.base_fields['strip'].html5.items()))
+        self.assertRaises(ValueError, forms.CharField, whitespace='trim')
+
+        # blank after stripping is missing
+        form = WhitespaceForm({'strip': u'   ', 'collapse': u'x', 'raw': u'y'})
+        self.assertEquals(form.errors.keys(), ['strip'])
+
+        class Snippet(models.Model):
+            title = models.CharField(max_length=100)
+            code = models.CharField(max_length=100)
+
+            class Meta:
+                app_label = 'tests'
+
+        class SnippetForm(forms.HTML5ModelForm):
+            code = forms.CharField(whitespace='none')
+
+            class Meta:
+                model = Snippet
+
+        form = SnippetForm({'title': u'  Title  ', 'code': u'  x = 1\n'})
+        self.assertTrue(form.is_valid())
+        self.assertEquals(form.cleaned_data['title'], u'Title')
+        self.assertEquals(form.cleaned_data['code'], u'  x = 1\n')
+
+        # a field shared with a plain form keeps its behaviour there
+        shared = forms.CharField(required=False)
+
+        class NotesForm(forms.Form):
+            notes = shared
+
+        class NotedSnippetForm(forms.HTML5ModelForm):
+            notes = shared
+
+            class Meta:
+                model = Snippet
+
+        form = NotedSnippetForm({'title': u'x', 'code': u'y', 'notes': u' n '})
+        self.assertTrue(form.is_valid())
+        self.assertEquals(form.cleaned_data['notes'], u'n')
+        self.assertEquals(shared.whitespace, None)
+        form = NotesForm({'notes': u' n '})
+        self.assertTrue(form.is_valid())
+        self.assertEquals(form.cleaned_data['notes'], u' n ')
+
+        # as are fields added in __init__
+        class LateSnippetForm(forms.HTML5ModelForm):
+            class Meta:
+                model = Snippet
+
+            def __init__(self, *args, **kwargs):
+                super(LateSnippetForm, self).__init__(*args, **kwargs)
+                self.fields['notes'] = forms.CharField(required=False)
+
+        form = LateSnippetForm({'title': u'x', 'code': u'y', 'notes': u' n '})
+        self.assertTrue(form.is_valid())
+        self.assertEquals(form.cleaned_data['notes'], u'n')
+
+    def test_lazy_attributes(self):
+        """Lazy placeholders are resolved once per widget class and language"""
+        from django.utils.functional import lazy
+        from django.utils import translation
+        calls = []
+
+        def translate(text):
+            calls.append(text)
+            return u'%s (%s)' % (text, translation.get_language())
+        lazy_translate = lazy(translate, unicode)
+
+        forms.SearchInput.resolved_attributes.clear()
+        try:
+            translation.activate('de')
+            for i in range(3):
+                widget = forms.SearchInput(attrs={'placeholder': lazy_translate(u'Find')})
+                self.assertTrue(u'placeholder="Find (de)"' in widget.render('q', ''))
+            self.assertEquals(calls, [u'Find'])
+            translation.activate('fr')
+            self.assertTrue(u'placeholder="Find (fr)"' in widget.render('q', ''))
+            self.assertEquals(calls, [u'Find', u'Find'])
+        finally:
+            translation.deactivate()
+        self.assertEquals(len(forms.SearchInput.resolved_attributes), 2)
+        self.assertFalse(forms.EmailInput.resolved_attributes is forms.SearchInput.resolved_attributes)
+
+    def test_escaped_attributes(self):
+        """Static attributes are escaped once and follow mutations"""
+        widget = forms.TextInput(attrs={'placeholder': u'a < b'})
+        first = widget.render('name', u'"value"', {'id': 'id_name'})
+        self.assertTrue(u'placeholder="a &lt; b"' in first)
+        self.assertTrue(u'value="&quot;value&quot;"' in first)
+        self.assertTrue(('placeholder', unicode, u'a < b') in forms.TextInput.escaped_attributes)
+        self.assertEquals(widget.render('name', u'"value"', {'id': 'id_name'}), first)
+
+        # mutated like TodoForm.__init__ does
+        widget.placeholder = u'c & d'
+        self.assertTrue(u'placeholder="c &amp; d"' in widget.render('name', None, {}))
+
+        # render attributes are not kept
+        widget.render('name', None, {'id': 'id_other', 'class': 'wide'})
+        self.assertFalse(('class', str, 'wide') in forms.TextInput.escaped_attributes)
+        self.assertFalse(('id', str, 'id_other') in forms.TextInput.escaped_attributes)
+
+    def test_compiled_render(self):
+        """Compiled render functions produce the same markup"""
+        from django.utils.safestring import mark_safe
+        from django.utils import translation
+        import copy
+
+        def both(widget, *args):
+            widget.compile_renders = False
+            expected = widget.render(*args)
+            widget.compile_renders = True
+            # the first render compiles, the second uses the function
+            self.assertEquals(widget.render(*args), expected)
+            self.assertEquals(widget.render(*args), expected)
+            return expected
+
+        text = forms.TextInput(attrs={'placeholder': u'Name'})
+        for value in (None, u'', u'<b>"Tom" & \'Jerry\'</b>', mark_safe(u'<b>safe</b>'), 12):
+            both(text, 'name', value, {'id': 'id_name'})
+            both(text, 'name', value, {'id': 'id_name', 'class': 'a<b'})
+        both(text, 'na"me', u'x', None)
+
+        # changing an attribute compiles the widget again
+        text.compile_renders = True
+        text.render('name', u'x', {'id': 'id_name'})
+        text.placeholder = u'Other & more'
+        self.assertTrue(u'placeholder="Other &amp; more"' in text.render('name', u'x', {'id': 'id_name'}))
+        text.attrs['size'] = 10
+        self.assertTrue(u'size="10"' in both(text, 'name', u'x', {'id': 'id_name'}))
+
+        checkbox = forms.CheckboxInput()
+        for value in (None, u'', True, False, u'on', u'<yes>'):
+            both(checkbox, 'done', value, {'id': 'id_done'})
+        area = forms.Textarea(attrs={'rows': 4})
+        for value in (None, u'', u'a < b\n'):
+            both(area, 'body', value, {'id': 'id_body'})
+        select = forms.Select(choices=[(1, u'One'), (2, u'Two & more')])
+        both(select, 'number', 2, {'id': 'id_number'})
+
+        # copies share the compiled functions of the original
+        number = forms.NumberInput(attrs={'min': 0, 'max': 10})
+        number.compile_renders = True
+        number_copy = copy.deepcopy(number)
+        self.assertTrue(number_copy._compiled_render is number._compiled_render)
+        self.assertEquals(number_copy.render('n', 5, {'id': 'id_n'}), number.render('n', 5, {'id': 'id_n'}))
+
+        # lazy placeholders follow the active language
+        search = forms.SearchInput()
+        try:
+            for language in ('de', 'en', 'de'):
+                translation.activate(language)
+                both(search, 'q', u'', {'id': 'id_q'})
+        finally:
+            translation.deactivate()
+
+    def test_multiple_hidden_input(self):
+        """Hidden inputs render from one template and read back every value"""
+        from django.http import QueryDict
+        choices = [(unicode(i), i) for i in range(5)]
+
+        class BulkForm(forms.Form):
+            ids = forms.MultipleChoiceField(choices=choices, widget=forms.MultipleHiddenInput)
+            compact = forms.MultipleChoiceField(choices=choices, required=False,
+                widget=forms.MultipleHiddenInput(delimiter=','))
+
+        form = BulkForm(initial={'ids': [u'1', u'', u'<3'], 'compact': [1, 2, 4]})
+        self.assertEquals(unicode(form['ids']).split('\n'), [
+            u'<input spellcheck="off" type="hidden" name="ids" value="1" id="id_ids_0" required>',
+            u'<input spellcheck="off" type="hidden" name="ids" id="id_ids_1" required>',
+            u'<input spellcheck="off" type="hidden" name="ids" value="&lt;3" id="id_ids_2" required>'])
+        self.assertEquals(unicode(form['compact']),
+            u'<input type="hidden" spellcheck="off" name="compact" value="1,2,4" id="id_compact" >')
+
+        form = BulkForm(QueryDict('ids=1&ids=3&compact=0,2'))
+        self.assertTrue(form.is_valid())
+        self.assertEquals(form.cleaned_data, {'ids': [u'1', u'3'], 'compact': [u'0', u'2']})
+        form = BulkForm(QueryDict('ids=1&compact='))
+        self.assertTrue(form.is_valid())
+        self.assertEquals(form.cleaned_data['compact'], [])
+        widget = BulkForm.base_fields['compact'].widget
+        self.assertEquals(widget.value_from_datadict(QueryDict('compact='), {}, 'compact'), [])
+        self.assertEquals(widget.value_from_datadict(QueryDict('ids=1'), {}, 'compact'), None)
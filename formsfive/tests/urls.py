@@ -0,0 +1,8 @@
+#!/usr/bin/env python
+from django.conf.urls import patterns, url
+
+urlpatterns = patterns('',
+    url(r'^tags/$', 'formsfive.views.example', name='tag_lookup'),
+    url(r'^images/$', 'formsfive.views.example', name='generic_images_modal'),
+    url(r'^search/$', 'formsfive.views.example', name='search_interchange_modal'),
+)
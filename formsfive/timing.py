@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+'''
+Per-field render and clean timings, e.g. to find the slow field of a page:
+
+    with timings() as results:
+        response = render_to_response('page.html', {'form': form})
+    # results['render']['country'] == {'calls': 1, 'time': 0.02, 'bytes': 51230}
+
+or, for every field while instrumentation is enabled:
+
+    field_timed.connect(receiver)
+    enable_timing()
+
+Widget render and field clean methods are only wrapped while timing is
+enabled, so there is no cost at all otherwise. The wrapping patches the
+classes, so it affects the whole process: while any thread is inside
+timings() or enable_timing(), every thread's renders and cleans pay for
+the wrappers and send field_timed; only the results dict of timings()
+is per thread. Nested calls (the
+subwidgets of a MultiWidget, the fields of a MultiValueField) count
+towards the outermost one. Streamed rendering (render_iter) is not timed.
+'''
+from django.dispatch import Signal
+from django.forms.forms import BaseForm
+from django.forms.widgets import Widget
+from formsfive import widgets, extra, fields, models
+from contextlib import contextmanager
+from functools import wraps
+from time import time
+import threading
+
+__all__ = ('field_timed', 'enable_timing', 'disable_timing', 'timings')
+
+# sent after every outermost render or clean while timing is enabled
+field_timed = Signal(providing_args=['kind', 'name', 'elapsed', 'size'])
+
+_lock = threading.Lock()
+_enabled = 0
+_patched = list()
+_local = threading.local()
+
+
+def targets():
+    '''
+    The (class, method name, kind) triples wrapped by enable_timing().
+    '''
+    for module in (widgets, extra):
+        # every widget defined there, exported or not (e.g. HTML5Input)
+        for cls in vars(module).values():
+            if isinstance(cls, type) and issubclass(cls, Widget) and cls.__module__ == module.__name__:
+                for method in ('render', 'render_options'):
+                    if method in cls.__dict__:
+                        yield cls, method, 'render'
+    yield fields.HTML5Field, 'clean', 'clean'
+    yield fields.SplitDateTimeField, 'clean', 'clean'
+    yield models.CachedChoicesMixin, 'clean', 'clean'
+
+
+def field_name(instance, args, kwargs):
+    if isinstance(instance, Widget):
+        return kwargs.get('name', args[0] if args else None)
+    names = getattr(_local, 'names', None) or {}
+    return names.get(id(instance), instance.__class__.__name__)
+
+
+def record(sender, kind, name, elapsed, size):
+    for results in getattr(_local, 'results', ()):
+        stats = results[kind].setdefault(name, {'calls': 0, 'time': 0.0, 'bytes': 0})
+        stats['calls'] += 1
+        stats['time'] += elapsed
+        stats['bytes'] += size
+    field_timed.send(sender=sender, kind=kind, name=name, elapsed=elapsed, size=size)
+
+
+def timed(cls, method, kind):
+    original = cls.__dict__.get(method)
+
+    def call(self, *args, **kwargs):
+        if original is None:
+            return getattr(super(cls, self), method)(*args, **kwargs)
+        return original(self, *args, **kwargs)
+
+    def wrapper(self, *args, **kwargs):
+        if getattr(_local, 'depth', 0):
+            return call(self, *args, **kwargs)
+        _local.depth = 1
+        start, output = time(), None
+        try:
+            output = call(self, *args, **kwargs)
+            return output
+        finally:
+            _local.depth = 0
+            elapsed = time() - start
+            size = 0
+            if kind == 'render' and output is not None:
+                size = len(output.encode('utf-8')) if isinstance(output, unicode) else len(output)
+            record(self.__class__, kind, field_name(self, args, kwargs), elapsed, size)
+    wrapper.__name__ = method
+    wrapper.__doc__ = getattr(original, '__doc__', None)
+    return original, wrapper
+
+
+def full_clean(original):
+    '''
+    Tell the clean wrappers the names of the form's fields.
+    '''
+    @wraps(original)
+    def wrapper(self):
+        previous = getattr(_local, 'names', None)
+        _local.names = dict((id(field), self.add_prefix(name)) for name, field in self.fields.items())
+        try:
+            return original(self)
+        finally:
+            _local.names = previous
+    return wrapper
+
+
+def enable_timing():
+    '''
+    Start timing renders and cleans in every thread of the process.
+    Calls nest; timing stops with the last matching disable_timing().
+    '''
+    global _enabled
+    with _lock:
+        _enabled += 1
+        if _enabled > 1:
+            return
+        for cls, method, kind in targets():
+            original, wrapper = timed(cls, method, kind)
+            _patched.append((cls, method, original))
+            setattr(cls, method, wrapper)
+        _patched.append((BaseForm, 'full_clean', BaseForm.__dict__['full_clean']))
+        BaseForm.full_clean = full_clean(BaseForm.__dict__['full_clean'])
+
+
+def disable_timing():
+    global _enabled
+    with _lock:
+        if not _enabled:
+            return
+        _enabled -= 1
+        if _enabled:
+            return
+        while _patched:
+            cls, method, original = _patched.pop()
+            if original is None:
+                delattr(cls, method)
+            else:
+                setattr(cls, method, original)
+
+
+@contextmanager
+def timings():
+    '''
+    Collect the timings of this thread inside the block into a dict:
+    {'render': {name: stats}, 'clean': {name: stats}} where stats
+    holds the calls, total seconds and (rendered) bytes.
+    '''
+    results = {'render': {}, 'clean': {}}
+    stack = getattr(_local, 'results', ())
+    _local.results = stack + (results,)
+    enable_timing()
+    try:
+        yield results
+    finally:
+        disable_timing()
+        _local.results = stack
@@ -1,6 +1,14 @@
 #!/usr/bin/env python
+from django.core.urlresolvers import reverse, NoReverseMatch, get_urlconf, get_script_prefix
+from django.utils.translation import get_language
+from django.utils.encoding import force_unicode
+from django.utils.functional import Promise
+from django.utils.html import conditional_escape
+from django.forms.util import flatatt
 from formsfive.attributes import *
 from itertools import chain
+from numbers import Number
+import inspect
 
 
 def single_attributes(self):
@@ -18,17 +26,117 @@ def single_attributes(self):
     return ' '.join(chain(elements))
 
 
-def create_attributes(self, *args):
+def compile_attributes(*args):
     '''
-    Simple method to construct the
-    html5 attributes needed
+    Flatten attribute groups (see formsfive.attributes) into
+    an ordered tuple of unique attribute names, in COLLECT_ORDER.
     '''
-    listed = list()
+    plan = list()
     for arg in args:
         for value in arg:
-            listed.append(value)
-    check = tuple(listed)
-    return dict([(key, values) for key, values in self.__dict__.items() if key in check and values not in EMPTY_VALUES])
+            if value not in plan:
+                plan.append(value)
+    order = lambda key: COLLECT_ORDER.index(key) if key in COLLECT_ORDER else len(COLLECT_ORDER)
+    return tuple(sorted(plan, key=order))
+
+
+def create_attributes(self, *args):
+    '''
+    Simple method to construct the
+    html5 attributes needed. Without arguments the
+    widget class' precompiled attribute_plan is used.
+    '''
+    if args:
+        plan = compile_attributes(*args)
+    else:
+        plan = self.attribute_plan
+    spec, attributes = self.html5, self.__dict__
+    found = list()
+    for key in plan:
+        if key in attributes:
+            found.append((key, attributes[key]))
+        elif key in spec:
+            found.append((key, spec.get(key)))
+    # resolve translations first, comparing a lazy string translates it
+    found = [(key, isinstance(value, Promise) and resolve_lazy(self, value) or value) for key, value in found]
+    return dict([(key, value) for key, value in found if not is_empty(value)])
+
+
+def is_empty(value):
+    '''
+    Whether an attribute is left out. Compared by type, so 0
+    (e.g. min=0) is rendered while False is not.
+    '''
+    if isinstance(value, Number) and not isinstance(value, bool):
+        return False
+    return value in EMPTY_VALUES
+
+
+_attribute_caches = list()
+
+
+def attribute_cache():
+    '''
+    A new cache for resolve_lazy or flat_attributes, emptied by
+    clear_attribute_caches().
+    '''
+    cache = dict()
+    _attribute_caches.append(cache)
+    return cache
+
+
+def resolve_lazy(self, value):
+    '''
+    Translate a lazy attribute value once per widget class and
+    active language. Lazy strings are keyed by their message, so the
+    placeholders created for every widget instance share one entry.
+    '''
+    cache = getattr(self, 'resolved_attributes', None)
+    if cache is None:
+        return force_unicode(value)
+    try:
+        func, args, kwargs = value.__reduce__()[1][:3]
+        key = (get_language(), func, args, tuple(sorted(kwargs.items())))
+        return cache[key]
+    except KeyError:
+        cache[key] = resolved = force_unicode(value)
+        return resolved
+    except (AttributeError, TypeError, ValueError):
+        # not a lazy() proxy or unhashable arguments
+        return force_unicode(value)
+
+
+# attributes that differ from render to render
+DYNAMIC_ATTRIBUTES = ('name', 'id', 'value', 'checked')
+ESCAPED_TYPES = (unicode, str, int, long, float, bool)
+ESCAPED_CACHE_SIZE = 1000
+
+
+def flat_attributes(self, final_attrs, attrs=None):
+    '''
+    flatatt() for the widget's own render. The escaped key="value"
+    pairs of its static attributes are kept per widget class, so
+    only the dynamic ones (name, id, value and the ``attrs`` passed
+    to render) are escaped every time. Pairs are keyed by value, so
+    mutating a widget attribute simply uses another entry.
+    '''
+    cache = getattr(self, 'escaped_attributes', None)
+    if cache is None:
+        return flatatt(final_attrs)
+    pairs = list()
+    for key, value in final_attrs.items():
+        if key in DYNAMIC_ATTRIBUTES or (attrs and key in attrs) or type(value) not in ESCAPED_TYPES:
+            pairs.append(u' %s="%s"' % (key, conditional_escape(value)))
+            continue
+        entry = (key, type(value), value)
+        try:
+            pairs.append(cache[entry])
+        except KeyError:
+            if len(cache) >= ESCAPED_CACHE_SIZE:
+                cache.clear()
+            cache[entry] = pair = u' %s="%s"' % (key, conditional_escape(value))
+            pairs.append(pair)
+    return u''.join(pairs)
 
 
 def update_widget(self):
@@ -36,51 +144,103 @@ def update_widget(self):
     Use this is order to render HTML single attribute correctly.
     This is mostly used for multiple widgets
     '''
-    #lets assume some disfaults
-    self.autofocus = self.attrs.get('autofocus', False)
-    self.disabled = self.attrs.get('disabled', False)
-
     defaults = dict([(key, val) for key, val in self.attrs.items() if key in WIDGETS])
-    self.__dict__.update(defaults)
+    # HTML5 attributes go to the widget's spec, anything else on the widget
+    self.html5 = self.html5.replace(**dict([(key, val) for key, val in defaults.items() if key in SPEC]))
+    self.__dict__.update([(key, val) for key, val in defaults.items() if key not in SPEC])
     self.attrs = dict(item for item in self.attrs.iteritems() if item not in defaults.items())
     return self
 
 
-def check_default(self, check):
-    if str(self.autocapitalize) != check['autocapitalize']:
-            self.widget.autocapitalize = self.autocapitalize
+def argument_defaults(func):
+    '''
+    Return a dictionary of the keyword arguments of ``func``
+    and their default values.
+    '''
+    args, varargs, kwords, defaults = inspect.getargspec(func)
+    defaults = defaults or ()
+    return dict(zip(args[len(args) - len(defaults):], defaults))
+
+
+def is_default(value, default):
+    '''
+    Compare by type as well so 0 is not mistaken for False. String
+    defaults (spellcheck, autocorrect and autocapitalize 'off') are
+    meant to be rendered, so they always count as set and are handed
+    on to the widget.
+    '''
+    if isinstance(default, basestring):
+        return False
+    return type(value) is type(default) and value == default
 
-    if str(self.autocorrect) != check['autocorrect']:
-        self.widget.autocorrect = self.autocorrect
 
-    if str(self.autofocus) != check['autofocus']:
-        self.widget.autofocus = self.autofocus
+def check_default(self, check=None):
+    '''
+    Hand every HTML5 attribute that differs from its default
+    on to the field's widget. The field only keeps those in its spec,
+    so usually the widget simply shares the field's spec.
+    '''
+    spec = self.html5
+    if check is not None:
+        spec = spec.__class__([(key, value) for key, value in spec.items()
+            if key in check and not is_default(value, check[key])])
+    self.widget.html5 = self.widget.html5.merge(spec)
+    return self
 
-    if str(self.disabled) != check['disabled']:
-        self.widget.disabled = self.disabled
 
-    if str(self.pattern) != check['pattern']:
-        self.widget.pattern = self.pattern
+def defining_class(self, name):
+    for klass in type(self).__mro__:
+        if name in klass.__dict__:
+            return klass
 
-    if str(self.placeholder) != check['placeholder']:
-        self.widget.placeholder = self.placeholder
 
-    if str(self.readonly) != check['readonly']:
-        self.widget.readonly = self.readonly
+def render_chunks(self, name, value, attrs=None):
+    '''
+    Render a widget as an iterable of chunks. render_iter is only
+    trusted when it is defined at least as far down the class
+    hierarchy as render; otherwise a subclass customized render and
+    the widget is rendered in one piece.
+    '''
+    render_iter = defining_class(self, 'render_iter')
+    if render_iter is not None and issubclass(render_iter, defining_class(self, 'render')):
+        return self.render_iter(name, value, attrs)
+    return [self.render(name, value, attrs)]
 
-    if str(self.results) != check['results']:
-        self.widget.results = self.results
 
-    if str(self.spellcheck) != check['spellcheck']:
-        self.widget.spellcheck = self.spellcheck
+_reverse_cache = dict()
 
-    if str(self.min) != check['min']:
-        self.widget.min = self.min
 
-    if str(self.max) != check['max']:
-        self.widget.max = self.max
+def cached_reverse(viewname):
+    '''
+    reverse() memoized per URLconf and script prefix, so every widget
+    of a formset shares one lookup. Failures are remembered as well.
+    '''
+    key = (viewname, get_urlconf(), get_script_prefix())
+    try:
+        url = _reverse_cache[key]
+    except KeyError:
+        try:
+            url = reverse(viewname)
+        except NoReverseMatch, e:
+            url = e
+        _reverse_cache[key] = url
+    if isinstance(url, NoReverseMatch):
+        raise url
+    return url
+
+
+def clear_reverse_cache():
+    '''
+    Forget the resolved urls, e.g. in tests that swap ROOT_URLCONF
+    without set_urlconf().
+    '''
+    _reverse_cache.clear()
 
-    if str(self.step) != check['step']:
-        self.widget.step = self.step
 
-    return self
+def clear_attribute_caches():
+    '''
+    Forget the translated and escaped attribute values of every widget
+    class, e.g. in tests that change the translation settings.
+    '''
+    for cache in _attribute_caches:
+        cache.clear()
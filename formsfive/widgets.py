@@ -1,14 +1,24 @@
 #!/usr/bin/env python
-from formsfive.utils import create_attributes, single_attributes
+from formsfive.utils import compile_attributes, create_attributes, single_attributes
+from formsfive.utils import attribute_cache, resolve_lazy, flat_attributes
 from django.utils.html import escape, conditional_escape
 from django.utils.translation import ugettext_lazy as _
-from django.utils.encoding import force_unicode
+from django.utils.encoding import StrAndUnicode, force_unicode
+from django.utils.functional import Promise
 from django.utils.safestring import mark_safe
-from django.forms.widgets import flatatt
-from formsfive.utils import update_widget
+from django.forms.widgets import flatatt, MediaDefiningClass
+from formsfive.utils import update_widget, render_chunks
+from formsfive.options import get_compiled_options
+from formsfive.spec import HTML5Spec, spec_attribute
+from formsfive.cache import cache_fragment
+from formsfive.compiled import compiled_render, compiled_functions, compiling_enabled
+from formsfive.compiled import input_shape, checkbox_shape, textarea_shape, tag_shape
+from formsfive.compiled import MARK, escape as escape_value
+from django.utils.datastructures import MultiValueDict, MergeDict
 from formsfive.attributes import *
 from django.forms import widgets
 from itertools import chain
+import copy
 import re
 
 __all__ = (
@@ -27,6 +37,32 @@ class Widget(widgets.Widget):
     pass
 
 
+class HTML5WidgetMetaclass(MediaDefiningClass):
+    '''
+    Compile the attribute groups of a widget class into a frozen
+    attribute plan once, when the class is created, so render only
+    looks at the attributes the widget can actually emit.
+
+    The HTML5 attributes (see attributes.SPEC) are stored in the
+    widget's shared ``html5`` spec; a class may still declare its own
+    default for one, e.g. ``min = 1``.
+
+    Every class also gets its own caches of translated (lazy) and
+    escaped attribute values, see utils.resolve_lazy and flat_attributes.
+    '''
+    def __new__(cls, name, bases, attrs):
+        new_class = super(HTML5WidgetMetaclass, cls).__new__(cls, name, bases, attrs)
+        new_class.attribute_plan = compile_attributes(*new_class.attribute_groups)
+        new_class.resolved_attributes = attribute_cache()
+        new_class.escaped_attributes = attribute_cache()
+        for key, default in SPEC.iteritems():
+            if key in attrs:
+                setattr(new_class, key, spec_attribute(key, attrs[key]))
+            elif not isinstance(getattr(new_class, key, None), property):
+                setattr(new_class, key, spec_attribute(key, default))
+        return new_class
+
+
 class BaseInput(widgets.Widget):
     '''
     Customer base class for all <input> widgets (except type='checkbox' and
@@ -35,7 +71,16 @@ class BaseInput(widgets.Widget):
     If you want to override the default placeholder value just place it in
     widget=HTMLInput(placeholder='some value')
     '''
+    __metaclass__ = HTML5WidgetMetaclass
     input_type = None
+    attribute_groups = (UNIVERSAL, TEXT_SEARCH)
+    html5 = HTML5Spec.EMPTY
+
+    def __getattr__(self, name):
+        # keywords added by field subclasses through html5_attributes
+        if name in self.html5:
+            return self.html5.get(name)
+        raise AttributeError("'%s' object has no attribute '%s'" % (self.__class__.__name__, name))
 
     def _format_value(self, value):
         if self.is_localized:
@@ -45,14 +90,20 @@ class BaseInput(widgets.Widget):
     def render(self, name, value, attrs=None):
         if value is None:
             value = ''
-        final_attrs = self.build_attrs(attrs, type=self.input_type, placeholder=self.placeholder, name=name)
+        placeholder = self.placeholder
+        if isinstance(placeholder, Promise):
+            placeholder = resolve_lazy(self, placeholder)
+        final_attrs = self.build_attrs(attrs, type=self.input_type, placeholder=placeholder, name=name)
         if value != '':
             # Only add the 'value' attribute if a value is non-empty.
             final_attrs['value'] = force_unicode(self._format_value(value))
         if self.is_required:
-            return mark_safe(u'<input%s required>' % flatatt(final_attrs))
+            return mark_safe(u'<input%s required>' % flat_attributes(self, final_attrs, attrs))
         else:
-            return mark_safe(u'<input%s>' % flatatt(final_attrs))
+            return mark_safe(u'<input%s>' % flat_attributes(self, final_attrs, attrs))
+
+
+TEXT_PLAN = compile_attributes(UNIVERSAL, TEXT_SEARCH)
 
 
 class HTML5Input(BaseInput):
@@ -67,6 +118,8 @@ class HTML5Input(BaseInput):
     '''
     # setup common input attributes
     input_type = 'text'
+    # see formsfive.compiled
+    compile_renders = None
 
     def __init__(self, attrs=None, *args, **kwargs):
         super(HTML5Input, self).__init__(attrs, *args, **kwargs)
@@ -82,11 +135,10 @@ class HTML5Input(BaseInput):
         # Use this is order to render HTML single attribute correctly.
         # You will use mostly for multiple widgets
         update_widget(self)
-        self.autocorrect = self.attrs.get('autocorrect', 'off')
-        self.autocapitalize = self.attrs.get('autocapitalize', 'off')
-        self.results = self.attrs.get('results', None)
-        self.readonly = self.attrs.get('readonly', None)
+        self.html5 = self.html5.replace(**dict([(key, self.attrs[key])
+            for key in ('autocorrect', 'autocapitalize', 'results', 'readonly') if key in self.attrs]))
 
+    @compiled_render(input_shape)
     def render(self, name, value, attrs=None, new_attrs=None, elements=None):
         # build a list of possible elements
         if not elements:
@@ -94,7 +146,10 @@ class HTML5Input(BaseInput):
 
         if not new_attrs:
             # below removes empty attributes and also removes dictionary of attributes that are not longer necessary
-            new_attrs = create_attributes(self, UNIVERSAL, TEXT_SEARCH)
+            new_attrs = create_attributes(self)
+            if not new_attrs:
+                # widgets without attributes of their own render the text ones
+                new_attrs = create_attributes(self, TEXT_PLAN)
 
         if value is None: value = ''
         # set default
@@ -105,7 +160,29 @@ class HTML5Input(BaseInput):
             # This adds non-dictionary items to the input field such as required
             final_attrs['value'] = force_unicode(value)
 
-        return mark_safe(u'<input%s %s>' % (flatatt(final_attrs), elements))
+        return mark_safe(u'<input%s %s>' % (flat_attributes(self, final_attrs, attrs), elements))
+
+    def __deepcopy__(self, memo):
+        '''
+        Forms copy every widget per instance. Only attrs is mutable;
+        the HTML5 spec, choices and compiled options are shared.
+        '''
+        if compiling_enabled(self):
+            # the copies share the compiled renders of this widget
+            compiled_functions(self)
+        obj = self.__class__.__new__(self.__class__)
+        obj.__dict__ = self.__dict__.copy()
+        obj.attrs = self.attrs.copy()
+        memo[id(self)] = obj
+        return obj
+
+    def render_iter(self, name, value, attrs=None):
+        '''
+        Yield the rendered widget in chunks. Widgets with potentially
+        large output (selects, radio and checkbox groups, multi widgets)
+        override this; everything else renders in one chunk.
+        '''
+        yield self.render(name, value, attrs)
 
     def format_value(self, value):
         if value != '':
@@ -117,23 +194,22 @@ class TextInput(widgets.TextInput, HTML5Input):
     input_type = 'text'
 
     def __init__(self, attrs=None):
-        default_attrs = {'pattern': '^[\w\s]+'}
+        default_attrs = {'pattern': TEXT_PATTERN}
         if attrs:
-            default_attrs.update(final_attrs)
+            default_attrs.update(attrs)
         super(TextInput, self).__init__(default_attrs)
 
     def render(self, name, value, attrs):
-        new_attrs = create_attributes(self, UNIVERSAL, TEXT_SEARCH)
-        return HTML5Input.render(self, name, value, attrs, new_attrs)
+        return HTML5Input.render(self, name, value, attrs)
 
 
 class PasswordInput(widgets.PasswordInput, HTML5Input):
     input_type = 'password'
+    attribute_groups = (UNIVERSAL, PASSWORD)
 
     def render(self, name, value, attrs=None):
-        new_attrs = create_attributes(self, UNIVERSAL, PASSWORD)
         if not self.render_value: value=None
-        return HTML5Input.render(self, name, value, attrs, new_attrs)
+        return HTML5Input.render(self, name, value, attrs)
 
     def format_value(self, value):
         return value
@@ -154,73 +230,113 @@ class HiddenInput(widgets.HiddenInput, HTML5Input):
     is_hidden = True
 
     def render(self, name, value, attrs):
-        new_attrs = create_attributes(self, UNIVERSAL, TEXT_SEARCH)
-        return HTML5Input.render(self, name, value, attrs, new_attrs)
+        return HTML5Input.render(self, name, value, attrs)
 
 
 class MultipleHiddenInput(widgets.HiddenInput, HTML5Input):
     '''
-    !!WORK-ON!!
+    One hidden input per value. The inputs only differ in their value
+    and id, so the first one is rendered with markers and the others
+    are filled into that markup.
 
+    With a ``delimiter`` all values travel in a single hidden input
+    instead (e.g. delimiter=',' renders value="1,2,3"), which suits
+    large lists of ids that never contain the delimiter.
     '''
     input_type = 'hidden'
     is_hidden = True
 
-    def __init__(self, attrs=None, choices=()):
+    def __init__(self, attrs=None, choices=(), delimiter=None):
         super(MultipleHiddenInput, self).__init__(attrs)
         self.choices = choices
+        self.delimiter = delimiter
 
     def render(self, name, value, attrs=None, choices=()):
         if value is None:
             value = []
+        if self.delimiter is not None:
+            value = self.delimiter.join([force_unicode(v) for v in value])
+            return HTML5Input.render(self, name, value, attrs)
 
-        new_attrs = create_attributes(self, UNIVERSAL, TEXT_SEARCH)
+        new_attrs = create_attributes(self)
 
         final_attrs = self.build_attrs(attrs, type=self.input_type, name=name, **new_attrs)
 
         id_ = final_attrs.get('id', None)
+        template = None
         inputs = []
         for i, v in enumerate(value):
-            input_attrs = dict(value=force_unicode(v), **final_attrs)
-            if id_:
-                input_attrs['id'] = '%s_%s' % (id_, i)
-            del input_attrs['type']
-            del input_attrs['value']
-            input_ = HiddenInput()
-            input_.is_required = self.is_required
-            inputs.append(input_.render(name, force_unicode(v), input_attrs))
+            v = force_unicode(v)
+            if template is None and v != '':
+                template = self.input_template(name, final_attrs, id_)
+            if template and v != '':
+                inputs.append(template % {'value': escape_value(v), 'index': i})
+            else:
+                inputs.append(self.render_input(name, final_attrs, id_, i, v))
         return "\n".join(inputs)
 
+    def render_input(self, name, final_attrs, id_, i, value):
+        input_attrs = dict(value=value, **final_attrs)
+        if id_:
+            input_attrs['id'] = '%s_%s' % (id_, i)
+        del input_attrs['type']
+        del input_attrs['value']
+        input_ = HiddenInput()
+        input_.is_required = self.is_required
+        return input_.render(name, value, input_attrs)
+
+    def input_template(self, name, final_attrs, id_):
+        '''
+        The markup of one non-empty input as a format string taking
+        the escaped value and the index, or None if it cannot be made.
+        '''
+        output = self.render_input(name, final_attrs, id_, MARK % 'index', MARK % 'value')
+        template = output.replace(u'%', u'%%').replace(MARK % 'value', u'%(value)s').replace(
+            MARK % 'index', u'%(index)s')
+        if u'\ue000' in template or u'\ue001' in template:
+            return None
+        return template
+
+    def value_from_datadict(self, data, files, name):
+        if self.delimiter is not None:
+            value = data.get(name, None)
+            if not value:
+                return [] if value is not None else None
+            return value.split(self.delimiter)
+        if isinstance(data, (MultiValueDict, MergeDict)):
+            return data.getlist(name)
+        return data.get(name, None)
+
 
 class SlugInput(HTML5Input):
     def __init__(self, attrs=None):
-        default_attrs = {'pattern': '[\w-]+'}
+        default_attrs = {'pattern': SLUG_PATTERN}
         if attrs:
             default_attrs.update(attrs)
         super(SlugInput, self).__init__(default_attrs)
 
     def render(self, name, value, attrs):
-        new_attrs = create_attributes(self, UNIVERSAL, TEXT_SEARCH)
-        return HTML5Input.render(self, name, value, attrs, new_attrs)
+        return HTML5Input.render(self, name, value, attrs)
 
 
 class IPAddressInput(widgets.TextInput, HTML5Input):
     def __init__(self, attrs=None):
-        default_attrs = {'pattern': '(25[0-5]|2[0-4]\d|[0-1]?\d?\d)(\.(25[0-5]|2[0-4]\d|[0-1]?\d?\d)){3}'}
+        default_attrs = {'pattern': IPV4_PATTERN}
         if attrs:
             default_attrs.update(attrs)
         super(IPAddressInput, self).__init__(default_attrs)
 
     def render(self, name, value, attrs):
-        new_attrs = create_attributes(self, UNIVERSAL, TEXT_SEARCH)
-        return HTML5Input.render(self, name, value, attrs, new_attrs)
+        return HTML5Input.render(self, name, value, attrs)
 
 
 class CheckboxInput(widgets.CheckboxInput, HTML5Input):
     input_type = 'checkbox'
+    attribute_groups = (UNIVERSAL, CHOICE)
 
+    @compiled_render(checkbox_shape)
     def render(self, name, value, attrs=None, elements=None, choices=()):
-        new_attrs = create_attributes(self, UNIVERSAL, CHOICE)
+        new_attrs = create_attributes(self)
         elements = single_attributes(self)
         final_attrs = self.build_attrs(attrs, name=name, type="checkbox", **new_attrs)
         try:
@@ -232,26 +348,40 @@ class CheckboxInput(widgets.CheckboxInput, HTML5Input):
         if value not in ('', True, False, None):
             # Only add the 'value' attribute if a value is non-empty.
             final_attrs['value'] = force_unicode(value)
-        return mark_safe(u'<input%s %s>' % (flatatt(final_attrs), elements))
+        return mark_safe(u'<input%s %s>' % (flat_attributes(self, final_attrs, attrs), elements))
 
 
 class Select(widgets.Select, HTML5Input):
+    attribute_groups = (UNIVERSAL, SELECT)
+    # see formsfive.cache
+    cache_fragments = None
+
     def __init__(self, attrs=None, choices=()):
         super(Select, self).__init__(attrs)
         self.choices = list(choices)
 
+    @cache_fragment
     def render(self, name, value, attrs=None, choices=()):
-        new_attrs = create_attributes(self, UNIVERSAL, SELECT)
+        return mark_safe(u''.join(self.render_iter(name, value, attrs, choices)))
+
+    def render_iter(self, name, value, attrs=None, choices=()):
+        if value is None: value = ''
+        return self.iter_select(u'<select%s %s>', name, [value], attrs, choices)
+
+    def iter_select(self, start, name, selected_choices, attrs=None, choices=()):
+        yield self.start_tag(name, start, attrs)
+        for chunk in self.iter_options(choices, selected_choices):
+            yield u'\n'
+            yield chunk
+        yield u'\n</select>'
+
+    @compiled_render(tag_shape)
+    def start_tag(self, name, start, attrs=None):
+        new_attrs = create_attributes(self)
         # build a list of possible elements
         elements = single_attributes(self)
-        if value is None: value = ''
         final_attrs = self.build_attrs(attrs, name=name, **new_attrs)
-        output = [u'<select%s %s>' % (flatatt(final_attrs), elements)]
-        options = self.render_options(choices, [value])
-        if options:
-            output.append(options)
-        output.append(u'</select>')
-        return mark_safe(u'\n'.join(output))
+        return start % (flat_attributes(self, final_attrs, attrs), elements)
 
     def render_option(self, selected_choices, option_value, option_label):
         if not isinstance(option_value, (unicode)):
@@ -261,9 +391,29 @@ class Select(widgets.Select, HTML5Input):
             escape(option_value), selected_html,
             conditional_escape(force_unicode(option_label)))
 
-    def render_options(self, choices, selected_choices):
+    def compiled_options(self, choices=()):
+        '''
+        Return the pre-escaped options for static choices, or None when
+        the choices are dynamic (e.g. a queryset) or render_option has
+        been overridden. Widget copies share the compiled options.
+        '''
+        if self.render_option.im_func is not Select.render_option.im_func:
+            return None
+        return get_compiled_options(self, choices)
+
+    def iter_options(self, choices, selected_choices, chunk_size=500):
+        '''
+        Yield the rendered options in chunks of up to ``chunk_size``
+        lines. Chunks are meant to be joined by a newline.
+        '''
         # Normalize to strings.
         selected_choices = set([force_unicode(v) for v in selected_choices])
+        options = self.compiled_options(choices)
+        if options is not None:
+            output = options.render(selected_choices)
+            if output:
+                yield output
+            return
         output = []
         for option_value, option_label in chain(self.choices, choices):
             if isinstance(option_label, (list, tuple)):
@@ -273,31 +423,39 @@ class Select(widgets.Select, HTML5Input):
                 output.append(u'</optgroup>')
             else:
                 output.append(self.render_option(selected_choices, option_value, option_label))
-        return u'\n'.join(output)
+            if len(output) >= chunk_size:
+                yield u'\n'.join(output)
+                output = []
+        if output:
+            yield u'\n'.join(output)
+
+    def render_options(self, choices, selected_choices):
+        return u'\n'.join(self.iter_options(choices, selected_choices))
 
 
 class NullBooleanSelect(widgets.NullBooleanSelect, Select):
+    null_choices = ((u'1', _(u'Unknown')),
+                    (u'2', _(u'Yes')),
+                    (u'3', _(u'No')))
 
-    def render(self, name, value, attrs=None, choices=()):
-        choices = ((u'1', _(u'Unknown')),
-                   (u'2', _(u'Yes')),
-                   (u'3', _(u'No')))
+    def render_iter(self, name, value, attrs=None, choices=()):
         try:
             value = {True: u'2', False: u'3', u'2': u'2', u'3': u'3'}[value]
         except KeyError:
             value = u'1'
-        return Select.render(self, name, value, attrs, choices=choices)
+        return Select.render_iter(self, name, value, attrs, choices=self.null_choices)
 
 
 class Textarea(HTML5Input, widgets.Textarea):
 
+    @compiled_render(textarea_shape)
     def render(self, name, value, attrs=None):
-        new_attrs = create_attributes(self, UNIVERSAL, TEXT_SEARCH)
+        new_attrs = create_attributes(self)
         attrs.update(**new_attrs)
         elements = single_attributes(self)
         if value is None: value = ''
         final_attrs = self.build_attrs(attrs, name=name)
-        return mark_safe(u'<textarea%s %s>%s</textarea>' % (flatatt(final_attrs),
+        return mark_safe(u'<textarea%s %s>%s</textarea>' % (flat_attributes(self, final_attrs, attrs),
                 elements, conditional_escape(force_unicode(value))))
 
 
@@ -308,21 +466,13 @@ class FileInput(HTML5Input, widgets.FileInput):
 
 class SelectMultiple(Select):
 
-    def render(self, name, value, attrs=None, choices=()):
-        new_attrs = create_attributes(self, UNIVERSAL, SELECT)
-        # build a list of possible elements
-        elements = single_attributes(self)
+    def render_iter(self, name, value, attrs=None, choices=()):
         if value is None: value = ''
-        final_attrs = self.build_attrs(attrs, name=name, **new_attrs)
-        output = [u'<select multiple="multiple"%s %s>' % (flatatt(final_attrs), elements)]
-        options = self.render_options(choices, value)
-        if options:
-            output.append(options)
-        output.append(u'</select>')
-        return mark_safe(u'\n'.join(output))
+        return self.iter_select(u'<select multiple="multiple"%s %s>', name, value, attrs, choices)
 
 
 class RadioInput(widgets.RadioInput, HTML5Input):
+    attribute_groups = (UNIVERSAL,)
 
     def __init__(self, name, value, attrs, choice, index, elements=None):
         self.name, self.value = name, value
@@ -341,7 +491,7 @@ class RadioInput(widgets.RadioInput, HTML5Input):
         return mark_safe(u'<label%s>%s %s</label>' % (label_for, self.tag(), choice_label))
 
     def tag(self):
-        new_attrs = create_attributes(self, UNIVERSAL)
+        new_attrs = create_attributes(self)
         #attrs.update(**new_attrs)
         self.attrs.update(**new_attrs)
         if self.elements:
@@ -358,50 +508,128 @@ class RadioInput(widgets.RadioInput, HTML5Input):
 
 class CheckboxSelectMultiple(SelectMultiple):
 
-    def render(self, name, value, attrs=None, choices=()):
+    def render_iter(self, name, value, attrs=None, choices=()):
         if value is None: value = []
         has_id = attrs and 'id' in attrs
         final_attrs = self.build_attrs(attrs, name=name)
-        output = [u'<ul>']
+        # One checkbox resolves the attributes shared by every row
+        # (see update_widget), instead of a CheckboxInput per choice.
+        checkbox = CheckboxInput(final_attrs)
+        shared = dict(checkbox.attrs, type='checkbox')
+        shared.pop('id', None)
+        start = u'<input%s' % flatatt(shared)
+        end = u' %s>' % single_attributes(checkbox)
+        yield u'<ul>'
         # Normalize to strings
         str_values = set([force_unicode(v) for v in value])
         for i, (option_value, option_label) in enumerate(chain(self.choices, choices)):
             # If an ID attribute was given, add a numeric index as a suffix,
             # so that the checkboxes don't all have the same ID attribute.
             if has_id:
-                final_attrs = dict(final_attrs, id='%s_%s' % (attrs['id'], i))
-                label_for = u' for="%s"' % final_attrs['id']
+                id_ = '%s_%s' % (attrs['id'], i)
+                label_for = u' for="%s"' % id_
+                id_ = u' id="%s"' % conditional_escape(id_)
             else:
-                label_for = ''
-
-            cb = CheckboxInput(final_attrs, check_test=lambda value: value in str_values)
+                label_for = id_ = ''
             option_value = force_unicode(option_value)
-            rendered_cb = cb.render(name, option_value)
+            checked = option_value in str_values and u' checked="checked"' or ''
+            if option_value != '':
+                option_value = u' value="%s"' % conditional_escape(option_value)
             option_label = conditional_escape(force_unicode(option_label))
-            output.append(u'<li><label%s>%s %s</label></li>' % (label_for, rendered_cb, option_label))
-        output.append(u'</ul>')
-        return mark_safe(u'\n'.join(output))
+            yield u'\n<li><label%s>%s%s%s%s%s %s</label></li>' % (
+                label_for, start, checked, option_value, id_, end, option_label)
+        yield u'\n</ul>'
+
+
+class RadioRow(StrAndUnicode):
+    '''
+    One rendered choice of a RadioSelect, as yielded by
+    RadioSelect.subwidgets (i.e. {% for radio in form.field %}).
+    '''
+    def __init__(self, index, choice_value, label_for, tag, choice_label, checked):
+        self.index, self.choice_value, self.label_for = index, choice_value, label_for
+        self._tag, self.choice_label, self.checked = tag, choice_label, checked
+
+    def __unicode__(self):
+        return mark_safe(u'<label%s>%s %s</label>' % (self.label_for, self._tag, self.choice_label))
+
+    def tag(self):
+        return self._tag
+
+    def is_checked(self):
+        return self.checked
 
 
 class RadioSelect(widgets.RadioSelect, HTML5Input):
+    attribute_groups = (UNIVERSAL,)
+    # see formsfive.cache
+    cache_fragments = None
 
-    def render(self, name, value, attrs=None, choices=()):
-        new_attrs = create_attributes(self, UNIVERSAL)
-        # build a list of possible elements
-        elements = single_attributes(self)
-        attrs.update(**new_attrs)
+    def rows(self, name, value, attrs=None, choices=()):
+        '''
+        Lazily yield (index, choice_value, label_for, tag, choice_label, checked)
+        for every choice. The attributes shared by the group are serialized
+        once; only id, value and checked vary per row.
+        '''
+        attrs = dict(attrs or {}, **create_attributes(self))
+        id_ = attrs.pop('id', None)
+        start = u'<input%s' % flatatt(dict(attrs, type='radio', name=name))
+        end = u' %s>' % single_attributes(self)
+        if value is None: value = ''
+        value = force_unicode(value)
+        for i, (choice_value, choice_label) in enumerate(chain(self.choices, choices)):
+            choice_value = force_unicode(choice_value)
+            if id_:
+                label_for = u' for="%s_%s"' % (id_, i)
+                row_id = u' id="%s"' % conditional_escape(u'%s_%s' % (id_, i))
+            else:
+                label_for = row_id = u''
+            checked = choice_value == value
+            tag = u'%s%s value="%s"%s%s' % (start, row_id, conditional_escape(choice_value),
+                checked and u' checked="checked"' or u'', end)
+            yield i, choice_value, label_for, mark_safe(tag), conditional_escape(force_unicode(choice_label)), checked
 
-        output = list()
-        for i, choice in enumerate(self.choices):
-            output.append(RadioInput(name, value, attrs.copy(), choice, i, elements))
+    def subwidgets(self, name, value, attrs=None, choices=()):
+        for row in self.rows(name, value, attrs, choices):
+            yield RadioRow(*row)
+
+    @cache_fragment
+    def render(self, name, value, attrs=None, choices=()):
+        return mark_safe(u''.join(self.render_iter(name, value, attrs, choices)))
 
-        return mark_safe(u'<ul>\n%s\n</ul>' % u'\n'.join([u'<li>%s</li>'
-                % force_unicode(w) for w in output]))
+    def render_iter(self, name, value, attrs=None, choices=()):
+        yield u'<ul>\n'
+        separator = u''
+        for i, choice_value, label_for, tag, choice_label, checked in self.rows(name, value, attrs, choices):
+            yield u'%s<li><label%s>%s %s</label></li>' % (separator, label_for, tag, choice_label)
+            separator = u'\n'
+        yield u'\n</ul>'
 
 
 class MultiWidget(widgets.MultiWidget, HTML5Input):
 
+    def __deepcopy__(self, memo):
+        obj = HTML5Input.__deepcopy__(self, memo)
+        obj.widgets = [copy.deepcopy(widget, memo) for widget in self.widgets]
+        return obj
+
     def render(self, name, value, attrs=None):
+        output = [widget.render(*args) for widget, args in self.iter_widgets(name, value, attrs)]
+        return mark_safe(self.format_output(output))
+
+    def render_iter(self, name, value, attrs=None):
+        if self.format_output.im_func is not widgets.MultiWidget.format_output.im_func:
+            # a custom format_output needs every rendered widget at once
+            yield self.render(name, value, attrs)
+            return
+        for widget, args in self.iter_widgets(name, value, attrs):
+            for chunk in render_chunks(widget, *args):
+                yield chunk
+
+    def iter_widgets(self, name, value, attrs=None):
+        '''
+        Yield each widget with its (name, value, attrs) render arguments.
+        '''
         if self.is_localized:
             for widget in self.widgets:
                 widget.is_localized = self.is_localized
@@ -409,7 +637,6 @@ class MultiWidget(widgets.MultiWidget, HTML5Input):
         # in self.widgets.
         if not isinstance(value, list):
             value = self.decompress(value)
-        output = []
 
         final_attrs = self.build_attrs(attrs)
         id_ = final_attrs.get('id', None)
@@ -420,16 +647,16 @@ class MultiWidget(widgets.MultiWidget, HTML5Input):
                 widget_value = None
             if id_:
                 final_attrs = dict(final_attrs, id='%s_%s' % (id_, i))
-            output.append(widget.render(name + '_%s' % i, widget_value, final_attrs))
-        return mark_safe(self.format_output(output))
+            yield widget, (name + '_%s' % i, widget_value, final_attrs)
 
 
 class ClearableFileInput(HTML5Input, widgets.ClearableFileInput):
     input_type = 'file'
     needs_multipart_form = True
+    attribute_groups = (UNIVERSAL,)
 
     def render(self, name, value, attrs=None):
-        new_attrs = create_attributes(self, UNIVERSAL)
+        new_attrs = create_attributes(self)
         # build a list of possible elements
         elements = single_attributes(self)
 
@@ -463,18 +690,18 @@ class ClearableFileInput(HTML5Input, widgets.ClearableFileInput):
 
 class DateInput(widgets.DateInput, HTML5Input):
     input_type = 'date'
+    attribute_groups = (UNIVERSAL, TIME_NUMERIC)
 
     def render(self, name, value, attrs):
-        new_attrs = create_attributes(self, UNIVERSAL, TIME_NUMERIC)
-        return HTML5Input.render(self, name, value, attrs, new_attrs)
+        return HTML5Input.render(self, name, value, attrs)
 
 
 class TimeInput(widgets.TimeInput, HTML5Input):
     input_type = 'time'
+    attribute_groups = (UNIVERSAL, TIME_NUMERIC)
 
     def render(self, name, value, attrs):
-        new_attrs = create_attributes(self, UNIVERSAL, TIME_NUMERIC)
-        return HTML5Input.render(self, name, value, attrs, new_attrs)
+        return HTML5Input.render(self, name, value, attrs)
 
 
 class SplitDateTimeWidget(MultiWidget):
@@ -505,7 +732,7 @@ class EmailInput(HTML5Input):
 
     def __init__(self, attrs=None):
         default_attrs = {
-            'pattern': '/^((?!@)\S)+[@]((?!@)\S)+/',
+            'pattern': EMAIL_PATTERN,
             'placeholder': _(u'(i.e. address@domain.com)')}
         if attrs:
             default_attrs.update(attrs)
@@ -532,17 +759,20 @@ class NumberInput(HTML5Input):
     min = 1
     max = 5
     step = None
+    attribute_groups = (UNIVERSAL, PASSWORD, RANGE)
 
     def __init__(self, attrs=None):
         default_attrs = {'min': self.min, 'max': self.max, 'step': self.step}
+        # the class defaults are rendered but not enforced (see constraints)
+        self.implicit_attrs = dict([(key, value) for key, value in default_attrs.items()
+            if not attrs or key not in attrs])
         if attrs:
             default_attrs.update(attrs)
         super(NumberInput, self).__init__(default_attrs)
 
     def render(self, name, value, attrs=None):
-        new_attrs = create_attributes(self, UNIVERSAL, PASSWORD, RANGE)
         if value is None: value = ''
-        return HTML5Input.render(self, name, value, attrs, new_attrs)
+        return HTML5Input.render(self, name, value, attrs)
 
 
 class RangeInput(NumberInput):
@@ -574,14 +804,16 @@ class DataListInput(HTML5Input, widgets.Select):
     list = None
 
     def render(self, name, value, attrs=None, choices=()):
+        return mark_safe(u''.join(self.render_iter(name, value, attrs, choices)))
+
+    def render_iter(self, name, value, attrs=None, choices=()):
         if value is None: value = []
-        new_attrs = create_attributes(self, UNIVERSAL, TEXT_SEARCH)
+        new_attrs = create_attributes(self)
         final_attrs = self.build_attrs(attrs, type=self.input_type, name=name, list=name, **new_attrs)
-        output = list()
-        output.append(u'<input%s />' % flatatt(final_attrs))
-        output.append(u'<datalist id="%(name)s">' % final_attrs)
+        yield u'<input%s />' % flat_attributes(self, final_attrs, attrs)
+        yield u'\n<datalist id="%(name)s">' % final_attrs
         options = self.render_options(choices, value)
         if options:
-            output.append(options)
-        output.append(u'</datalist>')
-        return mark_safe(u'\n'.join(output))
+            yield u'\n'
+            yield options
+        yield u'\n</datalist>'